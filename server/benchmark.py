@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Atlas FastAPI backend
+
+Usage:
+    python benchmark.py cohort [--sizes 10000,100000,1000000] [--baseline-max 100000]
+    python benchmark.py wire [--sizes 10000]
+    python benchmark.py warm [--sizes 1000] [--latency 0.15]
+"""
+import argparse
+import asyncio
+import gc
+import gzip
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from main import (
+    ADMISSION_CLASSES,
+    ARROW_MEDIA_TYPE,
+    COHORT_FLOAT_FIELDS,
+    COHORT_INT_FIELDS,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    CacheSnapshotStore,
+    CohortRankingEntry,
+    FinancialCohort,
+    FinancialData,
+    brotli,
+    cache_get,
+    cache_set,
+    compress_body,
+    encode_records,
+    financial_cache,
+    financial_cohort,
+    get_mock_trials,
+    msgpack,
+    pa,
+    peer_rollups,
+    store_financial_data,
+    trials_cache,
+)
+
+SECTORS = ["Healthcare", "Technology", "Financial Services", "Consumer Defensive", "Industrials"]
+INDUSTRIES = ["Biotechnology", "Drug Manufacturers - General", "Medical Devices", "Software", "Banks"]
+
+
+def make_columns(size: int, seed: int = 42):
+    """Generate synthetic cohort columns of the given size"""
+    rng = np.random.default_rng(seed)
+    columns = {field: rng.integers(0, 1_000_000, size) for field in COHORT_INT_FIELDS}
+    columns.update({field: rng.uniform(1e6, 1e10, size) for field in COHORT_FLOAT_FIELDS})
+    tickers = [f"T{i:07d}" for i in range(size)]
+    names = [f"Company {i}" for i in range(size)]
+    random.seed(seed)
+    categories = {
+        "sector": [random.choice(SECTORS) for _ in range(size)],
+        "industry": [random.choice(INDUSTRIES) for _ in range(size)],
+    }
+    return tickers, names, categories, columns
+
+
+def measure(build):
+    """Return (result, bytes allocated, seconds) for a builder function"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def bench_cohort(sizes, baseline_max):
+    """Memory and sector-scan time: list of FinancialData vs FinancialCohort"""
+    print("📊 Cohort store: memory and scan time")
+    print(f"{'rows':>10} {'store':>12} {'memory MB':>10} {'build s':>9} {'scan ms':>9}")
+
+    for size in sizes:
+        tickers, names, categories, columns = make_columns(size)
+
+        if size <= baseline_max:
+            def build_models():
+                models = {}
+                for i, ticker in enumerate(tickers):
+                    values = {field: columns[field][i].item() for field in columns}
+                    models[ticker] = FinancialData(
+                        company_name=names[i],
+                        sector=categories["sector"][i],
+                        industry=categories["industry"][i],
+                        **values
+                    )
+                return models
+
+            models, memory, build_time = measure(build_models)
+            start = time.perf_counter()
+            ratios = [
+                m.rd_expense / m.revenue for m in models.values()
+                if m.sector == "Healthcare" and m.revenue
+            ]
+            float(np.median(ratios))
+            scan_time = time.perf_counter() - start
+            print(f"{size:>10} {'pydantic':>12} {memory / 1e6:>10.1f} {build_time:>9.2f} {scan_time * 1000:>9.1f}")
+            del models, ratios
+
+        def build_cohort():
+            cohort = FinancialCohort(capacity=size)
+            cohort.extend(tickers, names, categories, columns)
+            return cohort
+
+        cohort, memory, build_time = measure(build_cohort)
+        start = time.perf_counter()
+        ratios = cohort.ratio("rd_expense", "revenue")[cohort.group_mask("sector", "Healthcare")]
+        float(np.nanmedian(ratios))
+        scan_time = time.perf_counter() - start
+        print(f"{size:>10} {'cohort':>12} {memory / 1e6:>10.1f} {build_time:>9.2f} {scan_time * 1000:>9.1f}")
+        del cohort
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Fastest of several runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_wire_payloads(size: int):
+    """Synthetic content for the negotiated bulk endpoints, as the handlers hold it"""
+    tickers, names, _, _ = make_columns(size)
+    now = datetime.now()
+    companies = [
+        {
+            "id": str(i), "name": names[i], "ticker": tickers[i],
+            "description": f"{names[i]} develops therapeutics", "company_type": "biotech",
+            "created_at": now, "updated_at": now,
+        }
+        for i in range(size)
+    ]
+    rankings = [
+        CohortRankingEntry(company_name=names[i], ticker=tickers[i], x=0.5, y=0.5,
+                           rationale="AI ranking service not yet implemented")
+        for i in range(size)
+    ]
+    return {"companies": companies, "ranking": rankings}
+
+
+def bench_wire(sizes):
+    """Payload size and encode/decode time for each negotiated response format.
+    
+    Encode time covers the whole of negotiated_response: jsonable_encoder on the
+    handler's dicts or models, then encoding and compression. `prep ms` is the
+    jsonable_encoder share, which every format pays.
+    """
+    print("📦 Wire formats: payload size and encode/decode time")
+    print(f"{'rows':>10} {'payload':>10} {'format':>12} {'size KB':>10} "
+          f"{'prep ms':>10} {'encode ms':>10} {'decode ms':>10}")
+
+    formats = [("json", JSON_MEDIA_TYPE, None, lambda body: json.loads(body))]
+    formats.append(("json+gzip", JSON_MEDIA_TYPE, "gzip", lambda body: json.loads(gzip.decompress(body))))
+    if brotli is not None:
+        formats.append(("json+br", JSON_MEDIA_TYPE, "br", lambda body: json.loads(brotli.decompress(body))))
+    if msgpack is not None:
+        formats.append(("msgpack", MSGPACK_MEDIA_TYPE, None, lambda body: msgpack.unpackb(body)))
+    if pa is not None:
+        formats.append(("arrow", ARROW_MEDIA_TYPE, None, lambda body: pa.ipc.open_stream(body).read_all()))
+
+    for size in sizes:
+        for payload, content in make_wire_payloads(size).items():
+            prep_time = best_of(lambda: jsonable_encoder(content))
+            for label, media_type, encoding, decode in formats:
+                def encode():
+                    body = encode_records(jsonable_encoder(content), media_type)
+                    return compress_body(body, encoding) if encoding else body
+
+                body = encode()
+                encode_time = best_of(encode)
+                decode_time = best_of(lambda: decode(body))
+                print(f"{size:>10} {payload:>10} {label:>12} {len(body) / 1024:>10.1f} "
+                      f"{prep_time * 1000:>10.1f} {encode_time * 1000:>10.1f} {decode_time * 1000:>10.2f}")
+
+
+def make_models(size: int):
+    """Synthetic (ticker, FinancialData) pairs"""
+    tickers, names, categories, columns = make_columns(size)
+    return [
+        (ticker, FinancialData(
+            company_name=names[i],
+            sector=categories["sector"][i],
+            industry=categories["industry"][i],
+            **{field: columns[field][i].item() for field in columns}
+        ))
+        for i, ticker in enumerate(tickers)
+    ]
+
+
+def reset_state():
+    """Empty the caches and computed stores, as in a freshly started worker"""
+    financial_cohort.__init__()
+    peer_rollups.__init__(financial_cohort)
+    for cache in (financial_cache, trials_cache):
+        cache.clear()
+        cache.pending.clear()
+
+
+async def warm_from_upstream(models, latency: float, concurrency: int):
+    """Refill every cache entry through simulated upstream calls, limited like the upstream route class"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(ticker, data):
+        async with semaphore:
+            await asyncio.sleep(latency)  # profile
+            store_financial_data(ticker, data)
+            await asyncio.sleep(latency)  # trials
+            cache_set(trials_cache, data.company_name, get_mock_trials(data.company_name))
+
+    await asyncio.gather(*(fetch(ticker, data) for ticker, data in models))
+
+
+def serve_all(models):
+    """Look up every company's profile and trials, as the first requests after a restart would"""
+    for ticker, data in models:
+        assert cache_get(financial_cache, ticker) is not None
+        assert cache_get(trials_cache, data.company_name) is not None
+
+
+def bench_warm(sizes, latency: float):
+    """Time until a restarted worker serves every hot key: cold upstream refill vs snapshot restore"""
+    concurrency = ADMISSION_CLASSES["upstream"][0]
+    print(f"🔥 Time to warm ({latency * 1000:.0f}ms simulated upstream latency, concurrency {concurrency})")
+    print(f"{'rows':>10} {'start':>10} {'ready ms':>10} {'warm ms':>10} {'save ms':>10} {'disk MB':>10}")
+
+    for size in sizes:
+        models = make_models(size)
+
+        reset_state()
+        start = time.perf_counter()
+        asyncio.run(warm_from_upstream(models, latency, concurrency))
+        serve_all(models)
+        cold_time = time.perf_counter() - start
+        print(f"{size:>10} {'cold':>10} {'-':>10} {cold_time * 1000:>10.1f} {'-':>10} {'-':>10}")
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = CacheSnapshotStore(Path(directory))
+            start = time.perf_counter()
+            generation = store.write(store.capture())
+            save_time = time.perf_counter() - start
+            disk = sum(f.stat().st_size for f in generation.rglob("*") if f.is_file())
+
+            reset_state()
+            start = time.perf_counter()
+            store.load()
+            ready_time = time.perf_counter() - start
+            serve_all(models)
+            warm_time = time.perf_counter() - start
+            print(f"{size:>10} {'snapshot':>10} {ready_time * 1000:>10.1f} {warm_time * 1000:>10.1f} "
+                  f"{save_time * 1000:>10.1f} {disk / 1e6:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atlas backend benchmarks")
+    parser.add_argument("benchmark", choices=["cohort", "wire", "warm"])
+    parser.add_argument("--sizes", help="Comma-separated row counts "
+                        "(default: 10000,100000,1000000 for cohort, 10000 for wire, 1000 for warm)")
+    parser.add_argument("--baseline-max", type=int, default=100000,
+                        help="Largest size to build the Pydantic baseline for")
+    parser.add_argument("--latency", type=float, default=0.15,
+                        help="Simulated upstream call latency in seconds for the warm benchmark")
+    args = parser.parse_args()
+    default_sizes = {"cohort": "10000,100000,1000000", "wire": "10000", "warm": "1000"}
+    sizes = [int(size) for size in (args.sizes or default_sizes[args.benchmark]).split(",")]
+
+    print("🚀 Atlas Backend Benchmarks")
+    print("=" * 50)
+    if args.benchmark == "cohort":
+        bench_cohort(sizes, args.baseline_max)
+    elif args.benchmark == "wire":
+        bench_wire(sizes)
+    elif args.benchmark == "warm":
+        bench_warm(sizes, args.latency)
+
+
+if __name__ == "__main__":
+    main()
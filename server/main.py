@@ -1,8 +1,12 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -13,6 +17,38 @@ from datetime import datetime, timedelta
 import logging
 import json
 import math
+import time
+import csv
+import io
+import random
+import re
+import difflib
+import zlib
+import mmap
+import shutil
+import gzip
+import sys
+import hmac
+import threading
+from pathlib import Path
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow/Parquet export is optional
+    pa = None
+    pq = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are optional
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # Brotli compression is optional; gzip is always available
+    brotli = None
 
 # Load environment variables
 load_dotenv()
@@ -26,14 +62,109 @@ request_counts = {}
 RATE_LIMIT = int(os.getenv("RATE_LIMIT", "100"))
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
 
+# Request deadlines (seconds). Clients may ask for less with X-Request-Timeout.
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "15"))
+ROUTE_DEADLINES = {
+    "/api/finance/": float(os.getenv("FINANCE_DEADLINE", "8")),
+    "/api/clinical-trials/": float(os.getenv("TRIALS_DEADLINE", "10")),
+    "/api/molecules/": float(os.getenv("MOLECULES_DEADLINE", "8")),
+}
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Admission control: concurrency limit, bounded wait queue and wait budget (seconds) per route class
+ADMISSION_CLASSES = {
+    "cheap": (int(os.getenv("CHEAP_CONCURRENCY", "64")), float(os.getenv("CHEAP_WAIT_BUDGET", "1"))),
+    "upstream": (int(os.getenv("UPSTREAM_CONCURRENCY", "16")), float(os.getenv("UPSTREAM_WAIT_BUDGET", "5"))),
+    "heavy": (int(os.getenv("HEAVY_CONCURRENCY", "2")), float(os.getenv("HEAVY_WAIT_BUDGET", "10"))),
+}
+ADMISSION_QUEUE_FACTOR = int(os.getenv("ADMISSION_QUEUE_FACTOR", "4"))
+HEAVY_ROUTES = ("/api/export", "/api/ranking/cohort", "/api/companies/bulk")
+UPSTREAM_ROUTES = ("/api/finance/", "/api/clinical-trials/", "/api/molecules/", "/api/analysis/")
+ADMISSION_EXEMPT_ROUTES = ("/health", "/docs", "/redoc", "/openapi.json", "/api/admission/stats")
+
+# Tracing: spans are only recorded when the slow-request log or a profile is enabled
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+
+class RequestTrace:
+    """Spans recorded for one request as (name, offset, duration) in seconds"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[tuple] = []
+    
+    def summary(self) -> List[tuple]:
+        """(name, count, total ms, first offset ms) per span name, in order of first start"""
+        totals: Dict[str, list] = {}
+        for name, offset, duration in self.spans:
+            entry = totals.setdefault(name, [0, 0.0, offset])
+            entry[0] += 1
+            entry[1] += duration
+        return [(name, count, total * 1000, first * 1000)
+                for name, (count, total, first) in sorted(totals.items(), key=lambda item: item[1][2])]
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+@contextmanager
+def trace_span(name: str):
+    """Record how long the enclosed block takes; a no-op unless the request is traced"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans.append((name, start - trace.started, time.perf_counter() - start))
+
+class TracedRoute(APIRoute):
+    """APIRoute that records endpoint time and the validation/serialization around it"""
+    
+    def get_route_handler(self):
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+            async def traced_endpoint(*args, **kwargs):
+                with trace_span("endpoint"):
+                    return await endpoint(*args, **kwargs)
+            self.dependant.call = traced_endpoint
+        handler = super().get_route_handler()
+        
+        async def traced_handler(request):
+            trace = current_trace.get()
+            if trace is None:
+                return await handler(request)
+            started = time.perf_counter()
+            mark = len(trace.spans)
+            response = await handler(request)
+            elapsed = time.perf_counter() - started
+            endpoint_time = sum(duration for name, _, duration in trace.spans[mark:] if name == "endpoint")
+            trace.spans.append(("serialize", started - trace.started, max(0.0, elapsed - endpoint_time)))
+            return response
+        return traced_handler
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting Atlas Backend Server...")
     logger.info(f"📊 Rate Limit: {RATE_LIMIT} requests per {RATE_LIMIT_WINDOW} seconds")
+    snapshot_task = None
+    if SNAPSHOTS_ENABLED:
+        try:
+            cache_snapshots.load()
+        except Exception as e:
+            logger.error(f"Failed to restore cache snapshot, starting cold: {e}")
+        if SNAPSHOT_INTERVAL > 0:
+            snapshot_task = asyncio.create_task(cache_snapshots.run(SNAPSHOT_INTERVAL))
     yield
     # Shutdown
     logger.info("🛑 Shutting down Atlas Backend Server...")
+    await market_hub.stop()
+    if snapshot_task:
+        snapshot_task.cancel()
+    if SNAPSHOTS_ENABLED:
+        await cache_snapshots.save()
 
 # Create FastAPI app
 app = FastAPI(
@@ -44,22 +175,193 @@ app = FastAPI(
     redoc_url="/redoc",
     lifespan=lifespan
 )
+app.router.route_class = TracedRoute
 
-# Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[os.getenv("FRONTEND_URL", "http://localhost:3001")],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
+# Middleware (the last one added is outermost)
 app.add_middleware(
     TrustedHostMiddleware,
     allowed_hosts=["*"]  # Configure appropriately for production
 )
 
-# Rate limiting middleware
+# Deadline and disconnect middleware
+def resolve_deadline(path: str, header: Optional[str]) -> float:
+    """Route budget, shortened by the client's X-Request-Timeout header if given"""
+    budget = next((b for prefix, b in ROUTE_DEADLINES.items() if path.startswith(prefix)), REQUEST_DEADLINE)
+    try:
+        requested = float(header) if header else None
+    except ValueError:
+        requested = None
+    return min(budget, requested) if requested and requested > 0 else budget
+
+class DeadlineMiddleware:
+    """Sets the per-request deadline and cancels the handler when the client disconnects"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict(scope.get("headers") or [])
+        header = headers.get(b"x-request-timeout", b"").decode() or None
+        request_deadline.set(time.monotonic() + resolve_deadline(scope["path"], header))
+        
+        # One pump owns the real receive channel so it sees the disconnect even when
+        # the handler never reads the body; the bounded queue keeps backpressure on uploads
+        messages: asyncio.Queue = asyncio.Queue(maxsize=16)
+        response_started = False
+        disconnected = False
+        
+        async def wrapped_send(message):
+            nonlocal response_started
+            response_started = True
+            await send(message)
+        
+        handler = asyncio.create_task(self.app(scope, messages.get, wrapped_send))
+        
+        async def pump():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    # Once a response has started, streaming responses watch for disconnects themselves
+                    if not handler.done() and not response_started:
+                        logger.info(f"Client disconnected, cancelling {scope['path']}")
+                        disconnected = True
+                        handler.cancel()
+                    return
+        
+        watcher = asyncio.create_task(pump())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not (disconnected and handler.cancelled()):
+                handler.cancel()
+                raise
+            # Nobody is listening; this only completes the ASGI exchange cleanly
+            await JSONResponse(status_code=499, content={"error": "Client closed request"})(scope, receive, send)
+        finally:
+            watcher.cancel()
+
+# Admission control and load shedding middleware
+class AdmissionQueue:
+    """Concurrency limiter with a bounded FIFO wait queue and a wait-time estimate"""
+    
+    def __init__(self, name: str, limit: int, budget: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = limit * ADMISSION_QUEUE_FACTOR
+        self.budget = budget
+        self.semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.avg_service = 0.05  # EWMA of seconds per request, seeded optimistically
+    
+    def estimated_wait(self) -> float:
+        """Expected queueing delay for a new arrival"""
+        if self.active < self.limit and self.waiting == 0:
+            return 0.0
+        return (self.waiting + 1) * self.avg_service / self.limit
+    
+    def reject(self, estimate: float) -> int:
+        self.shed += 1
+        return max(1, math.ceil(estimate))
+    
+    async def acquire(self, deadline_left: Optional[float] = None) -> Optional[int]:
+        """Take a slot, or return a Retry-After in seconds if the request should be shed.
+        
+        The wait is capped by the request's remaining deadline as well as the class budget.
+        """
+        budget = self.budget if deadline_left is None else min(self.budget, deadline_left)
+        if self.semaphore.locked() or self.waiting:
+            estimate = self.estimated_wait()
+            if self.waiting >= self.max_queue or estimate > budget:
+                return self.reject(estimate)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), budget)
+            except asyncio.TimeoutError:
+                return self.reject(self.estimated_wait())
+            finally:
+                self.waiting -= 1
+        else:
+            await self.semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+        return None
+    
+    def release(self, elapsed: float):
+        self.active -= 1
+        self.avg_service = 0.8 * self.avg_service + 0.2 * elapsed
+        self.semaphore.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "wait_budget": self.budget,
+            "estimated_wait": round(self.estimated_wait(), 3),
+            "avg_service_ms": round(self.avg_service * 1000, 1),
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+admission_queues = {name: AdmissionQueue(name, limit, budget) for name, (limit, budget) in ADMISSION_CLASSES.items()}
+
+def classify_route(path: str) -> Optional[str]:
+    """Route class for admission control, or None for exempt routes"""
+    if path in ADMISSION_EXEMPT_ROUTES or path.startswith("/docs"):
+        return None
+    if path.startswith(HEAVY_ROUTES):
+        return "heavy"
+    if path.startswith(UPSTREAM_ROUTES):
+        return "upstream"
+    return "cheap"
+
+class AdmissionMiddleware:
+    """Sheds load with 503 + Retry-After when a route class's queue is over budget"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        route_class = classify_route(scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        
+        queue = admission_queues[route_class]
+        with trace_span("admission.wait"):
+            retry_after = await queue.acquire(remaining_time())
+        if retry_after is not None:
+            logger.warning(f"Shedding {scope['path']} ({route_class} queue over budget)")
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"error": "Server overloaded", "retry_after": retry_after},
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        
+        # The slot is held until the app returns, i.e. until streamed bodies finish too
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            queue.release(time.monotonic() - started)
+
+app.add_middleware(AdmissionMiddleware)
+# Outside admission, so time spent queueing counts against the request deadline
+app.add_middleware(DeadlineMiddleware)
+
+# Rate limiting middleware: outside admission, so over-limit clients get 429 without taking a slot
 @app.middleware("http")
 async def rate_limit_middleware(request, call_next):
     client_ip = request.client.host
@@ -87,8 +389,141 @@ async def rate_limit_middleware(request, call_next):
     response = await call_next(request)
     return response
 
+# Tracing and profiling middleware
+class SamplingProfiler:
+    """Samples one thread's Python stack on a timer and aggregates collapsed stacks for flamegraphs.
+    
+    Sampling the event loop thread captures whatever is running on it, so a request's profile
+    also contains stacks from requests served concurrently.
+    """
+    
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="atlas-profiler", daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+                self.samples += 1
+    
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, ready for flamegraph.pl or speedscope"""
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.counts.items())) + "\n"
+
+class TracingMiddleware:
+    """Collects trace spans, logs slow requests and serves opt-in per-request profiles.
+    
+    Does nothing unless SLOW_REQUEST_MS is set or the request carries a valid X-Profile-Token.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Compare raw bytes: compare_digest rejects non-ASCII str, which would turn a bad token into a 500
+        token = dict(scope.get("headers") or []).get(b"x-profile-token", b"")
+        profiling = bool(PROFILE_TOKEN) and hmac.compare_digest(token, PROFILE_TOKEN.encode())
+        if not SLOW_REQUEST_MS and not profiling:
+            await self.app(scope, receive, send)
+            return
+        
+        trace = RequestTrace()
+        current_trace.set(trace)
+        profiler = SamplingProfiler(threading.get_ident()) if profiling else None
+        response_status = None
+        
+        async def traced_send(message):
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                timing = ", ".join(f'{name};dur={total:.1f};desc="x{count}"'
+                                   for name, count, total, _ in trace.summary())
+                if timing:
+                    MutableHeaders(scope=message).append("Server-Timing", timing)
+            if profiler is None:
+                await send(message)
+        
+        if profiler:
+            profiler.start()
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            if profiler:
+                profiler.stop()
+            elapsed_ms = (time.perf_counter() - trace.started) * 1000
+            if SLOW_REQUEST_MS and elapsed_ms > SLOW_REQUEST_MS:
+                breakdown = ", ".join(f"{name} x{count} {total:.1f}ms @{first:.1f}ms"
+                                      for name, count, total, first in trace.summary())
+                logger.warning(f"Slow request {scope['method']} {scope['path']} took {elapsed_ms:.1f}ms: {breakdown or 'no spans'}")
+        
+        if profiler:
+            # The profile replaces the body; the original status travels in a header
+            await PlainTextResponse(profiler.collapsed(), headers={
+                "X-Original-Status": str(response_status),
+                "X-Profile-Samples": str(profiler.samples),
+                "X-Elapsed-Ms": f"{elapsed_ms:.1f}",
+            })(scope, receive, send)
+
+app.add_middleware(TracingMiddleware)
+
+# Outermost, so shed (503), timed-out and profiled responses still carry CORS headers
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[os.getenv("FRONTEND_URL", "http://localhost:3001")],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.get("/api/admission/stats", tags=["Health"])
+async def admission_stats():
+    """Queue depth, in-flight requests and shed counts per route class"""
+    return {name: queue.stats() for name, queue in admission_queues.items()}
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's deadline runs out before an upstream call completes"""
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current request's budget, or None outside a request"""
+    deadline = request_deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+async def within_deadline(awaitable, span: str = "upstream"):
+    """Await an upstream call, cancelling it if the request deadline runs out first"""
+    with trace_span(span):
+        remaining = remaining_time()
+        if remaining is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+
 # Pydantic models
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional, List, Dict, Any
 
 class CompanyBase(BaseModel):
@@ -175,6 +610,10 @@ class CompanyRankingOutput(BaseModel):
     y: float  # Differentiation score (0-1)
     rationale: str
 
+class CohortRankingEntry(CompanyRankingOutput):
+    company_name: str
+    ticker: str
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
@@ -183,6 +622,7 @@ class HealthResponse(BaseModel):
 
 # In-memory storage (replace with database in production)
 companies_db = []
+companies_by_ticker: Dict[str, Dict[str, Any]] = {}
 
 # Configuration
 FMP_BASE_URL = "https://financialmodelingprep.com/stable"
@@ -190,6 +630,182 @@ FMP_API_KEY = os.getenv("FMP_API_KEY")
 CTGOV_BASE = "https://clinicaltrials.gov/api/v2"
 CHEMBL_BASE = "https://www.ebi.ac.uk/chembl/api/data"
 MOCK_MODE = os.getenv("MOCK_MODE", "true").lower() == "true"
+CACHE_TTL = int(os.getenv("CACHE_TTL", "900"))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+FMP_BATCH_SIZE = int(os.getenv("FMP_BATCH_SIZE", "50"))
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "4"))
+DEFAULT_DESCRIPTION = "Company description will be populated here."
+MARKET_POLL_INTERVAL = float(os.getenv("MARKET_POLL_INTERVAL", "5"))
+MAX_WATCHLIST_SIZE = int(os.getenv("MAX_WATCHLIST_SIZE", "50"))
+SPONSOR_MATCH_CUTOFF = float(os.getenv("SPONSOR_MATCH_CUTOFF", "0.88"))
+MAX_SPONSOR_ALIASES = int(os.getenv("MAX_SPONSOR_ALIASES", "20"))
+PRICE_HISTORY_DIR = Path(os.getenv("PRICE_HISTORY_DIR", Path(__file__).parent / "data" / "price_history"))
+PRICE_REFRESH_INTERVAL = int(os.getenv("PRICE_REFRESH_INTERVAL", "3600"))
+PRICE_HISTORY_YEARS = int(os.getenv("PRICE_HISTORY_YEARS", "20"))
+CACHE_STALE_GRACE = int(os.getenv("CACHE_STALE_GRACE", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "true").lower() == "true"
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", Path(__file__).parent / "data" / "snapshots"))
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "300"))
+
+# In-process caches for upstream responses: key -> (expires_at, value)
+class SnapshotCache(dict):
+    """TTL cache that can also hold undecoded entries from a restored snapshot.
+    
+    Pending entries map key -> (expires_at, raw) and are decoded on first lookup.
+    With `load`, entries record only their expiry and each hit is built by `load(key)`
+    from a store that already holds the data.
+    """
+    
+    def __init__(self, decode=None, load=None):
+        super().__init__()
+        self.decode = decode
+        self.load = load
+        self.pending: Dict[str, tuple] = {}
+    
+    def restore(self, key: str) -> Optional[tuple]:
+        pending = self.pending.pop(key, None)
+        if pending is None:
+            return None
+        expires_at, raw = pending
+        entry = self[key] = (expires_at, None if self.load else self.decode(key, raw))
+        return entry
+
+# Profiles live in the columnar cohort; the cache only tracks their freshness
+financial_cache = SnapshotCache(load=lambda ticker: financial_cohort.get(ticker))
+trials_cache = SnapshotCache(lambda _, raw: [ClinicalTrial(**trial) for trial in json.loads(bytes(raw))])
+
+def cache_get(cache: SnapshotCache, key: str, allow_stale: bool = False):
+    """Return a cached value, or None if missing or (unless allow_stale) expired"""
+    with trace_span("cache.get"):
+        entry = cache.get(key)
+        if entry is None and cache.pending:
+            entry = cache.restore(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        now = time.time()
+        if expires_at + CACHE_STALE_GRACE < now:
+            cache.pop(key, None)
+            return None
+        if expires_at < now and not allow_stale:
+            return None
+        return cache.load(key) if cache.load else value
+
+def cache_set(cache: SnapshotCache, key: str, value, ttl: int = CACHE_TTL):
+    """Store a value in a cache with a time-to-live in seconds"""
+    cache.pending.pop(key, None)
+    cache.pop(key, None)  # re-insert at the end, so eviction drops the oldest writes first
+    cache[key] = (time.time() + ttl, None if cache.load else value)
+    if len(cache) + len(cache.pending) > CACHE_MAX_ENTRIES:
+        evict_cache(cache)
+
+def evict_cache(cache: SnapshotCache):
+    """Drop entries expired beyond the stale grace period, then the oldest writes, down to 90% of capacity"""
+    cutoff = time.time() - CACHE_STALE_GRACE
+    for store in (cache.pending, cache):
+        for key in [key for key, (expires_at, _) in store.items() if expires_at < cutoff]:
+            del store[key]
+    target = int(CACHE_MAX_ENTRIES * 0.9)
+    for store in (cache.pending, cache):
+        while store and len(cache) + len(cache.pending) > target:
+            del store[next(iter(store))]
+
+# Content negotiation for bulk responses: JSON, MessagePack or Arrow IPC, selected by Accept
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MEDIA_TYPE_ALIASES = {"application/x-msgpack": MSGPACK_MEDIA_TYPE}
+
+def _parse_header_values(value: str) -> List[tuple]:
+    """Split an Accept-style header into (value, q) pairs, highest q first"""
+    values = []
+    for position, part in enumerate(value.split(",")):
+        item, *params = [piece.strip() for piece in part.split(";")]
+        if not item:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        values.append((item.lower(), q, position))
+    return [(item, q) for item, q, _ in sorted(values, key=lambda v: (-v[1], v[2]))]
+
+def available_media_types() -> List[str]:
+    """Response formats this server can currently produce"""
+    media_types = [JSON_MEDIA_TYPE]
+    if msgpack is not None:
+        media_types.append(MSGPACK_MEDIA_TYPE)
+    if pa is not None:
+        media_types.append(ARROW_MEDIA_TYPE)
+    return media_types
+
+def negotiate_media_type(accept: str) -> Optional[str]:
+    """Pick the response format for an Accept header, or None if nothing acceptable is available"""
+    if not accept:
+        return JSON_MEDIA_TYPE
+    values = [(MEDIA_TYPE_ALIASES.get(media_type, media_type), q) for media_type, q in _parse_header_values(accept)]
+    refused = {media_type for media_type, q in values if q <= 0}
+    available = [media_type for media_type in available_media_types() if media_type not in refused]
+    for media_type, q in values:
+        if q <= 0:
+            continue
+        if media_type in available:
+            return media_type
+        if media_type in ("*/*", "application/*") and available:
+            return available[0]
+    return None
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from Accept-Encoding, preferring brotli when installed"""
+    accepted = dict(_parse_header_values(accept_encoding))
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    ranked = sorted(candidates, key=lambda encoding: -accepted.get(encoding, accepted.get("*", 0)))
+    best = ranked[0]
+    return best if accepted.get(best, accepted.get("*", 0)) > 0 else None
+
+def encode_records(records: List[Dict[str, Any]], media_type: str) -> bytes:
+    """Serialize JSON-compatible records in the given format"""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(records, use_bin_type=True)
+    if media_type == ARROW_MEDIA_TYPE:
+        table = pa.Table.from_pylist(records)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return json.dumps(records, separators=(",", ":")).encode("utf-8")
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with brotli or gzip"""
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=6)
+
+def negotiated_response(request: Request, content: List[Any]) -> Response:
+    """Render a list of records as JSON, MessagePack or Arrow IPC, compressing large text bodies"""
+    media_type = negotiate_media_type(request.headers.get("accept", ""))
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Supported formats: {', '.join(available_media_types())}"
+        )
+    
+    with trace_span("encode"):
+        body = encode_records(jsonable_encoder(content), media_type)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if media_type == JSON_MEDIA_TYPE and encoding and len(body) >= COMPRESSION_MIN_SIZE:
+        with trace_span(f"compress.{encoding}"):
+            body = compress_body(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
 
 # Mock data for development
 MOCK_COMPANIES = [
@@ -362,21 +978,245 @@ def get_mock_financial_data(ticker: str) -> FinancialData:
         net_income_growth=None
     )
 
+# Compact financial cohort store
+COHORT_INT_FIELDS = [f for f, info in FinancialData.model_fields.items() if info.annotation is int]
+COHORT_FLOAT_FIELDS = [f for f, info in FinancialData.model_fields.items() if info.annotation in (float, Optional[float])]
+COHORT_OPTIONAL_FIELDS = {f for f, info in FinancialData.model_fields.items() if info.annotation is Optional[float]}
+COHORT_CATEGORY_FIELDS = ["sector", "industry"]
+
+class FinancialCohort:
+    """Struct-of-arrays store for FinancialData: one typed NumPy array per numeric field.
+    
+    Sector and industry are interned to int32 codes (-1 for missing) and optional
+    floats use NaN for None. Convert to FinancialData only at the API edge. Peer
+    rollups and bulk export read these columns directly. Each sector/industry code
+    has a version that bumps whenever one of its rows changes, so derived per-group
+    summaries rebuild only when their own group does.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self.generation = 0
+        self.size = 0
+        self.capacity = capacity
+        self.index: Dict[str, int] = {}
+        self.tickers = np.empty(capacity, dtype=object)
+        self.names = np.empty(capacity, dtype=object)
+        self.columns: Dict[str, np.ndarray] = {f: np.zeros(capacity, dtype=np.int64) for f in COHORT_INT_FIELDS}
+        self.columns.update({f: np.zeros(capacity, dtype=np.float64) for f in COHORT_FLOAT_FIELDS})
+        self.codes: Dict[str, np.ndarray] = {f: np.full(capacity, -1, dtype=np.int32) for f in COHORT_CATEGORY_FIELDS}
+        self.categories: Dict[str, List[str]] = {f: [] for f in COHORT_CATEGORY_FIELDS}
+        self.category_index: Dict[str, Dict[str, int]] = {f: {} for f in COHORT_CATEGORY_FIELDS}
+        self.group_versions: Dict[str, List[int]] = {f: [] for f in COHORT_CATEGORY_FIELDS}
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.index
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the array buffers (object arrays count pointers only)"""
+        return sum(a.nbytes for a in self._arrays())
+    
+    def _arrays(self) -> List[np.ndarray]:
+        return [self.tickers, self.names, *self.columns.values(), *self.codes.values()]
+    
+    def reserve(self, capacity: int):
+        """Grow every array to at least `capacity` rows"""
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2)
+        
+        def grow(array: np.ndarray, fill) -> np.ndarray:
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            return grown
+        
+        self.tickers = grow(self.tickers, None)
+        self.names = grow(self.names, None)
+        self.columns = {f: grow(a, 0) for f, a in self.columns.items()}
+        self.codes = {f: grow(a, -1) for f, a in self.codes.items()}
+        self.capacity = capacity
+    
+    def intern(self, field: str, value: Optional[str]) -> int:
+        """Return the code for a sector/industry name, assigning one if new"""
+        if not value:
+            return -1
+        index = self.category_index[field]
+        if value not in index:
+            index[value] = len(self.categories[field])
+            self.categories[field].append(value)
+            self.group_versions[field].append(0)
+        return index[value]
+    
+    def _changed(self, row: int):
+        """Bump the versions of the groups a row belongs to"""
+        for field, codes in self.codes.items():
+            code = codes[row]
+            if code >= 0:
+                self.group_versions[field][code] += 1
+    
+    def group_version(self, field: str, codes: List[int]) -> tuple:
+        """Opaque stamp that changes whenever a row in any of these groups changes"""
+        return (self.generation, *(self.group_versions[field][code] for code in codes))
+    
+    def upsert(self, ticker: str, data: FinancialData):
+        row = self.index.get(ticker)
+        if row is not None:
+            self._changed(row)
+        else:
+            self.reserve(self.size + 1)
+            row = self.size
+            self.size += 1
+            self.index[ticker] = row
+            self.tickers[row] = ticker
+        self.names[row] = data.company_name
+        for field in COHORT_INT_FIELDS:
+            self.columns[field][row] = getattr(data, field)
+        for field in COHORT_FLOAT_FIELDS:
+            value = getattr(data, field)
+            self.columns[field][row] = np.nan if value is None else value
+        for field in COHORT_CATEGORY_FIELDS:
+            self.codes[field][row] = self.intern(field, getattr(data, field))
+        self._changed(row)
+    
+    def extend(self, tickers: List[str], names: List[Optional[str]],
+               categories: Dict[str, List[Optional[str]]], columns: Dict[str, np.ndarray]):
+        """Bulk-append new tickers from column data (missing numeric columns default to 0/NaN)"""
+        duplicates = [t for t in tickers if t in self.index]
+        if duplicates or len(set(tickers)) != len(tickers):
+            raise ValueError(f"Tickers already in cohort or repeated: {duplicates[:5]}")
+        count = len(tickers)
+        start, end = self.size, self.size + count
+        self.reserve(end)
+        self.tickers[start:end] = tickers
+        self.names[start:end] = names
+        for field, array in self.columns.items():
+            default = np.nan if field in COHORT_OPTIONAL_FIELDS else 0
+            array[start:end] = columns.get(field, default)
+        for field in COHORT_CATEGORY_FIELDS:
+            self.codes[field][start:end] = [self.intern(field, value) for value in categories.get(field, [None] * count)]
+            for code in np.unique(self.codes[field][start:end]).tolist():
+                if code >= 0:
+                    self.group_versions[field][code] += 1
+        self.index.update(zip(tickers, range(start, end)))
+        self.size = end
+    
+    def restore(self, tickers: List[str], names: List[Optional[str]], categories: Dict[str, List[str]],
+                columns: Dict[str, np.ndarray], codes: Dict[str, np.ndarray]):
+        """Adopt snapshotted arrays (memory-mapped copy-on-write) as the cohort's storage"""
+        self.generation += 1
+        self.size = self.capacity = len(tickers)
+        self.index = {ticker: row for row, ticker in enumerate(tickers)}
+        self.tickers = np.array(tickers, dtype=object)
+        self.names = np.array(names, dtype=object)
+        self.columns = columns
+        self.codes = codes
+        self.categories = {f: list(categories[f]) for f in COHORT_CATEGORY_FIELDS}
+        self.category_index = {f: {v: i for i, v in enumerate(self.categories[f])} for f in COHORT_CATEGORY_FIELDS}
+        self.group_versions = {f: [0] * len(self.categories[f]) for f in COHORT_CATEGORY_FIELDS}
+    
+    def remove(self, ticker: str):
+        """Drop a ticker by moving the last row into its slot"""
+        row = self.index.pop(ticker, None)
+        if row is None:
+            return
+        self._changed(row)
+        last = self.size - 1
+        if row != last:
+            for array in self._arrays():
+                array[row] = array[last]
+            self.index[self.tickers[row]] = row
+        self.tickers[last] = None
+        self.names[last] = None
+        self.size = last
+    
+    def column(self, field: str) -> np.ndarray:
+        """Read-only zero-copy view of a numeric field across the cohort"""
+        view = self.columns[field][:self.size]
+        view.flags.writeable = False
+        return view
+    
+    def category_codes(self, field: str) -> np.ndarray:
+        """Read-only zero-copy view of interned sector/industry codes"""
+        view = self.codes[field][:self.size]
+        view.flags.writeable = False
+        return view
+    
+    def group_mask(self, field: str, name: str) -> np.ndarray:
+        """Boolean mask of rows whose sector/industry equals `name`"""
+        code = self.category_index[field].get(name, -2)
+        return self.category_codes(field) == code
+    
+    def ratio(self, numerator: str, denominator: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorised numerator/denominator, NaN where the denominator is zero (optionally only `rows`)"""
+        num, den = self.column(numerator), self.column(denominator)
+        if rows is not None:
+            num, den = num[rows], den[rows]
+        out = np.full(len(num), np.nan)
+        np.divide(num, den, out=out, where=den != 0)
+        return out
+    
+    def rows(self, tickers: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Plain dict rows for a batch of tickers (None where untracked), gathered column-wise"""
+        positions = [self.index.get(t, -1) for t in tickers]
+        present = [p for p in positions if p >= 0]
+        gathered = {"company_name": self.names[present].tolist()}
+        for field in COHORT_CATEGORY_FIELDS:
+            labels = self.categories[field]
+            gathered[field] = [labels[c] if c >= 0 else None for c in self.codes[field][present].tolist()]
+        for field, array in self.columns.items():
+            values = array[present].tolist()
+            if field in COHORT_OPTIONAL_FIELDS:
+                values = [None if math.isnan(v) else v for v in values]
+            gathered[field] = values
+        
+        rows = []
+        cursor = 0
+        for position in positions:
+            if position < 0:
+                rows.append(None)
+                continue
+            rows.append({field: gathered[field][cursor] for field in FinancialData.model_fields})
+            cursor += 1
+        return rows
+    
+    def get(self, ticker: str) -> Optional[FinancialData]:
+        row = self.rows([ticker])[0]
+        return FinancialData(**row) if row else None
+
+financial_cohort = FinancialCohort()
+
+def store_financial_data(ticker: str, data: FinancialData):
+    """Record freshly fetched financials in the cohort store and peer rollups, and their freshness in the cache"""
+    cache_set(financial_cache, ticker, data)
+    peer_rollups.leave(ticker, data)
+    financial_cohort.upsert(ticker, data)
+    peer_rollups.join(ticker)
+
 # Finance API endpoints
 @app.get("/api/finance/profile/{ticker}", response_model=FinancialData, tags=["Finance"])
-async def get_company_profile(ticker: str):
-    """Get company financial profile by ticker symbol"""
+async def get_company_profile(ticker: str, response: Response = None):
+    """Get company financial profile by ticker symbol.
+    
+    Data cut short by the request deadline is flagged with X-Data-Status: partial or stale.
+    """
     if not FMP_API_KEY:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Financial Modeling Prep API key not configured"
         )
     
+    cached = cache_get(financial_cache, ticker.upper())
+    if cached is not None:
+        return cached
+    
     try:
         async with httpx.AsyncClient() as client:
             # Updated FMP API structure
             profile_url = f"{FMP_BASE_URL}/profile?symbol={ticker}&apikey={FMP_API_KEY}"
-            profile_response = await client.get(profile_url)
+            profile_response = await within_deadline(client.get(profile_url), "fmp.profile")
             profile_response.raise_for_status()
             
             profile_data = profile_response.json()
@@ -393,16 +1233,23 @@ async def get_company_profile(ticker: str):
             income_url = f"{FMP_BASE_URL}/income-statement?symbol={ticker_upper}&apikey={FMP_API_KEY}"
             balance_url = f"{FMP_BASE_URL}/balance-sheet-statement?symbol={ticker_upper}&apikey={FMP_API_KEY}"
             
-            income_response, balance_response = await asyncio.gather(
-                client.get(income_url),
-                client.get(balance_url)
-            )
-            
-            income_response.raise_for_status()
-            balance_response.raise_for_status()
-            
-            income_json = income_response.json()
-            balance_json = balance_response.json()
+            partial = False
+            try:
+                income_response, balance_response = await within_deadline(asyncio.gather(
+                    client.get(income_url),
+                    client.get(balance_url)
+                ), "fmp.statements")
+                
+                income_response.raise_for_status()
+                balance_response.raise_for_status()
+                
+                income_json = income_response.json()
+                balance_json = balance_response.json()
+            except DeadlineExceeded:
+                # Out of time: answer with the profile alone rather than keep waiting
+                logger.warning(f"Deadline reached fetching statements for {ticker}, returning partial data")
+                partial = True
+                income_json, balance_json = [], []
             
             income_data = income_json[0] if income_json and len(income_json) > 0 else {}
             balance_data = balance_json[0] if balance_json and len(balance_json) > 0 else {}
@@ -437,45 +1284,64 @@ async def get_company_profile(ticker: str):
             revenue_growth = ((current_revenue - previous_revenue) / previous_revenue * 100) if previous_revenue > 0 else None
             net_income_growth = ((current_net_income - previous_net_income) / previous_net_income * 100) if previous_net_income > 0 else None
             
-            return FinancialData(
-                # Basic Company Info
-                company_name=profile.get("companyName"),
-                sector=profile.get("sector"),
-                industry=profile.get("industry"),
-                employees=int(profile.get("fullTimeEmployees", 0)) if profile.get("fullTimeEmployees") else 0,
+            with trace_span("validate.financial_data"):
+                financial_data = FinancialData(
+                    # Basic Company Info
+                    company_name=profile.get("companyName"),
+                    sector=profile.get("sector"),
+                    industry=profile.get("industry"),
+                    employees=int(profile.get("fullTimeEmployees", 0)) if profile.get("fullTimeEmployees") else 0,
                 
-                # Market Data
-                price=price,
-                market_cap=market_cap,
-                beta=profile.get("beta", 0) or 0,
-                volume=profile.get("volume", 0) or 0,
-                average_volume=profile.get("averageVolume", 0) or 0,
+                    # Market Data
+                    price=price,
+                    market_cap=market_cap,
+                    beta=profile.get("beta", 0) or 0,
+                    volume=profile.get("volume", 0) or 0,
+                    average_volume=profile.get("averageVolume", 0) or 0,
                 
-                # Financial Metrics
-                revenue=current_revenue,
-                net_income=current_net_income,
-                eps=eps,
-                eps_diluted=income_data.get("epsDiluted", 0) or 0,
-                pe_ratio=pe_ratio,
+                    # Financial Metrics
+                    revenue=current_revenue,
+                    net_income=current_net_income,
+                    eps=eps,
+                    eps_diluted=income_data.get("epsDiluted", 0) or 0,
+                    pe_ratio=pe_ratio,
                 
-                # Balance Sheet
-                total_debt=total_debt,
-                cash=cash,
-                enterprise_value=enterprise_value,
+                    # Balance Sheet
+                    total_debt=total_debt,
+                    cash=cash,
+                    enterprise_value=enterprise_value,
                 
-                # Income Statement
-                rd_expense=income_data.get("researchAndDevelopmentExpenses", 0) or 0,
-                gross_profit=income_data.get("grossProfit", 0) or 0,
-                operating_income=income_data.get("operatingIncome", 0) or 0,
-                ebitda=income_data.get("ebitda", 0) or 0,
-                ebit=income_data.get("ebit", 0) or 0,
+                    # Income Statement
+                    rd_expense=income_data.get("researchAndDevelopmentExpenses", 0) or 0,
+                    gross_profit=income_data.get("grossProfit", 0) or 0,
+                    operating_income=income_data.get("operatingIncome", 0) or 0,
+                    ebitda=income_data.get("ebitda", 0) or 0,
+                    ebit=income_data.get("ebit", 0) or 0,
                 
-                # Growth Metrics
-                cagr=None,  # Would need multi-year data for proper CAGR calculation
-                revenue_growth=revenue_growth,
-                net_income_growth=net_income_growth
-            )
+                    # Growth Metrics
+                    cagr=None,  # Would need multi-year data for proper CAGR calculation
+                    revenue_growth=revenue_growth,
+                    net_income_growth=net_income_growth
+                )
+            
+            if partial:
+                if response is not None:
+                    response.headers["X-Data-Status"] = "partial"
+            else:
+                store_financial_data(ticker_upper, financial_data)
+            return financial_data
             
+    except DeadlineExceeded:
+        stored = cache_get(financial_cache, ticker.upper(), allow_stale=True) or financial_cohort.get(ticker.upper())
+        if stored is None:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Financial profile lookup exceeded the request deadline"
+            )
+        logger.warning(f"Deadline reached fetching profile for {ticker}, serving stored data")
+        if response is not None:
+            response.headers["X-Data-Status"] = "stale"
+        return stored
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error fetching data for {ticker}: {e}")
         # Return mock data if API fails
@@ -488,6 +1354,221 @@ async def get_company_profile(ticker: str):
         logger.info(f"Falling back to mock data for {ticker}")
         return get_mock_financial_data(ticker)
 
+# Historical prices: append-only, memory-mapped daily OHLCV files (one per ticker)
+OHLCV_DTYPE = np.dtype([
+    ("date", "<i4"),  # days since 1970-01-01
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+TICKER_PATTERN = re.compile(r"^[A-Z0-9.\-]{1,10}$")
+
+class PriceHistory(BaseModel):
+    ticker: str
+    method: str
+    total_points: int
+    points: int
+    dates: List[str]
+    open: List[float]
+    high: List[float]
+    low: List[float]
+    close: List[float]
+    volume: List[float]
+
+class PriceHistoryStore:
+    """Fixed-width OHLCV records appended in date order and read back through np.memmap"""
+    
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.maps: Dict[str, np.ndarray] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.checked_at: Dict[str, float] = {}
+    
+    def path(self, ticker: str) -> Path:
+        return self.directory / f"{ticker}.ohlcv"
+    
+    def lock(self, ticker: str) -> asyncio.Lock:
+        return self.locks.setdefault(ticker, asyncio.Lock())
+    
+    def read(self, ticker: str) -> np.ndarray:
+        """Zero-copy view of every stored row for a ticker"""
+        if ticker not in self.maps:
+            path = self.path(ticker)
+            size = path.stat().st_size if path.exists() else 0
+            rows = size // OHLCV_DTYPE.itemsize
+            if rows == 0:
+                return np.empty(0, dtype=OHLCV_DTYPE)
+            self.maps[ticker] = np.memmap(path, dtype=OHLCV_DTYPE, mode="r", shape=(rows,))
+        return self.maps[ticker]
+    
+    def last_date(self, ticker: str) -> Optional[int]:
+        rows = self.read(ticker)
+        return int(rows["date"][-1]) if len(rows) else None
+    
+    def append(self, ticker: str, rows: np.ndarray):
+        """Append rows strictly newer than the last stored date"""
+        last = self.last_date(ticker)
+        if last is not None:
+            rows = rows[rows["date"] > last]
+        if len(rows) == 0:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.path(ticker), "ab") as f:
+            f.write(np.ascontiguousarray(rows, dtype=OHLCV_DTYPE).tobytes())
+        self.maps.pop(ticker, None)
+
+price_store = PriceHistoryStore(PRICE_HISTORY_DIR)
+
+def _epoch_day(value: str) -> int:
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+def get_mock_price_history(ticker: str, start_day: int, end_day: int,
+                           last_close: Optional[float] = None) -> np.ndarray:
+    """Deterministic random-walk OHLCV rows for business days in [start_day, end_day].
+    
+    Top-ups continue the walk from the last stored close so the series has no jumps.
+    """
+    days = np.arange(start_day, end_day + 1)
+    days = days[np.is_busday(days.astype("datetime64[D]"))]
+    rows = np.zeros(len(days), dtype=OHLCV_DTYPE)
+    if len(days) == 0:
+        return rows
+    rng = np.random.default_rng(zlib.crc32(f"{ticker}:{start_day}".encode()))
+    base = last_close if last_close else get_mock_financial_data(ticker).price
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.015, len(days))))
+    spread = close * np.abs(rng.normal(0, 0.01, len(days)))
+    rows["date"] = days
+    rows["open"] = close + rng.normal(0, 0.5, len(days)) * spread
+    rows["high"] = np.maximum(rows["open"], close) + spread
+    rows["low"] = np.minimum(rows["open"], close) - spread
+    rows["close"] = close
+    rows["volume"] = rng.integers(100_000, 10_000_000, len(days))
+    return rows
+
+async def fetch_price_history(ticker: str, from_day: int, to_day: int) -> np.ndarray:
+    """Completed daily OHLCV rows from FMP in [from_day, to_day], oldest first"""
+    from_date = str(np.datetime64(from_day, "D"))
+    to_date = str(np.datetime64(to_day, "D"))
+    history_url = (f"{FMP_BASE_URL}/historical-price-eod/full?symbol={ticker}"
+                   f"&from={from_date}&to={to_date}&apikey={FMP_API_KEY}")
+    async with httpx.AsyncClient() as client:
+        response = await within_deadline(client.get(history_url), "fmp.history")
+        response.raise_for_status()
+    data = response.json()
+    if isinstance(data, dict):
+        data = data.get("historical", [])
+    rows = np.zeros(len(data), dtype=OHLCV_DTYPE)
+    for i, bar in enumerate(data):
+        rows[i] = (_epoch_day(bar["date"]), bar.get("open") or 0, bar.get("high") or 0,
+                   bar.get("low") or 0, bar.get("close") or 0, bar.get("volume") or 0)
+    # The file is append-only, so an in-progress bar must never get in
+    rows = rows[(rows["date"] >= from_day) & (rows["date"] <= to_day)]
+    return np.sort(rows, order="date")
+
+async def refresh_price_history(ticker: str):
+    """Top up the stored series with any days newer than the last stored bar"""
+    if time.time() - price_store.checked_at.get(ticker, 0) < PRICE_REFRESH_INTERVAL:
+        return
+    async with price_store.lock(ticker):
+        if time.time() - price_store.checked_at.get(ticker, 0) < PRICE_REFRESH_INTERVAL:
+            return
+        today = int(np.datetime64("today", "D").astype(np.int64))
+        last = price_store.last_date(ticker)
+        from_day = last + 1 if last is not None else today - PRICE_HISTORY_YEARS * 365
+        if from_day < today:
+            if MOCK_MODE or not FMP_API_KEY:
+                stored = price_store.read(ticker)
+                last_close = float(stored["close"][-1]) if len(stored) else None
+                rows = get_mock_price_history(ticker, from_day, today - 1, last_close)
+            else:
+                rows = await fetch_price_history(ticker, from_day, today - 1)
+            if len(rows):
+                price_store.append(ticker, rows)
+                logger.info(f"Stored {len(rows)} new daily bars for {ticker}")
+        price_store.checked_at[ticker] = time.time()
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `threshold` visually representative points"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def downsample_minmax(low: np.ndarray, high: np.ndarray, threshold: int) -> np.ndarray:
+    """Per-bucket indices of the lowest low and highest high, preserving every extreme"""
+    n = len(low)
+    buckets = max(threshold // 2, 1)
+    if threshold >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            selected.append(start + int(np.argmin(low[start:end])))
+            selected.append(start + int(np.argmax(high[start:end])))
+    return np.unique(selected)
+
+@app.get("/api/finance/history/{ticker}", response_model=PriceHistory, tags=["Finance"])
+async def get_price_history(ticker: str, width: int = 800, method: str = "lttb",
+                            start: Optional[str] = None, end: Optional[str] = None):
+    """Daily OHLCV history downsampled server-side to roughly `width` points"""
+    ticker = ticker.upper()
+    if not TICKER_PATTERN.match(ticker):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ticker")
+    if method not in ("lttb", "minmax"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Method must be lttb or minmax")
+    width = max(3, min(width, 10000))
+    
+    try:
+        await refresh_price_history(ticker)
+    except Exception as e:
+        # Serve whatever is already stored rather than failing the chart
+        logger.warning(f"Could not refresh price history for {ticker}: {e!r}")
+    
+    rows = price_store.read(ticker)
+    try:
+        lo = np.searchsorted(rows["date"], _epoch_day(start)) if start else 0
+        hi = np.searchsorted(rows["date"], _epoch_day(end), side="right") if end else len(rows)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dates must be YYYY-MM-DD")
+    window = rows[lo:hi]
+    if len(window) == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No price history available")
+    
+    if method == "lttb":
+        indices = downsample_lttb(window["date"], window["close"], width)
+    else:
+        indices = downsample_minmax(window["low"], window["high"], width)
+    points = window[indices]
+    
+    return PriceHistory(
+        ticker=ticker,
+        method=method,
+        total_points=len(window),
+        points=len(points),
+        dates=[str(d) for d in points["date"].astype("datetime64[D]")],
+        open=points["open"].tolist(),
+        high=points["high"].tolist(),
+        low=points["low"].tolist(),
+        close=points["close"].tolist(),
+        volume=points["volume"].tolist()
+    )
+
 @app.get("/api/finance/search", tags=["Finance"])
 async def search_companies(query: str):
     """Search companies by name or ticker"""
@@ -501,13 +1582,18 @@ async def search_companies(query: str):
         async with httpx.AsyncClient() as client:
             # Updated FMP API structure - using the correct search-symbol endpoint
             search_url = f"{FMP_BASE_URL}/search-symbol?query={query}&apikey={FMP_API_KEY}"
-            response = await client.get(search_url)
+            response = await within_deadline(client.get(search_url), "fmp.search")
             response.raise_for_status()
             
             data = response.json()
             # FMP returns a list, so return it directly
             return data
             
+    except DeadlineExceeded:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Company search exceeded the request deadline"
+        )
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error searching companies: {e}")
         # Return mock data if API fails
@@ -534,49 +1620,231 @@ async def search_companies(query: str):
         ]
 
 # Clinical Trials API endpoints
-@app.get("/api/clinical-trials/{company_name}", response_model=List[ClinicalTrial], tags=["Clinical Trials"])
-async def get_company_trials(company_name: str):
-    """Get clinical trials for a company"""
+def get_mock_trials(company_name: str) -> List[ClinicalTrial]:
+    """Generate mock clinical trials for a given company"""
+    return [
+        ClinicalTrial(
+            phase="PHASE2",
+            title=f"Mock Trial for {company_name}",
+            interventions=["ABC-123", "XYZ-789"],
+            enrollment=220,
+            status="Recruiting",
+            sponsor=company_name
+        )
+    ]
+
+# Known subsidiaries and sponsor spellings that fuzzy matching alone would miss
+SPONSOR_SUBSIDIARIES = {
+    "Johnson & Johnson": ["Janssen Research & Development, LLC", "Janssen Pharmaceuticals", "Janssen Biotech, Inc.", "Actelion"],
+    "Pfizer": ["Wyeth", "Hospira", "Seagen Inc.", "Arena Pharmaceuticals"],
+    "Merck & Co.": ["Merck Sharp & Dohme LLC"],
+    "Roche": ["Hoffmann-La Roche", "Genentech, Inc.", "Chugai Pharmaceutical"],
+    "AbbVie": ["Allergan", "Pharmacyclics LLC."],
+    "Bristol-Myers Squibb": ["Celgene", "MyoKardia, Inc.", "Mirati Therapeutics Inc."],
+    "AstraZeneca": ["MedImmune LLC", "Alexion Pharmaceuticals, Inc."],
+    "Sanofi": ["Genzyme, a Sanofi Company", "Sanofi Pasteur, a Sanofi Company"],
+    "Eli Lilly and Company": ["Loxo Oncology, Inc."],
+    "GlaxoSmithKline": ["GSK", "ViiV Healthcare"],
+    "Amgen": ["Horizon Therapeutics"],
+}
+SPONSOR_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "llc", "plc", "ag", "sa", "nv", "gmbh", "holdings", "group", "and", "the",
+}
+
+SPONSOR_GENERIC_TOKENS = {
+    "therapeutics", "pharmaceuticals", "pharmaceutical", "pharma", "biosciences", "bioscience",
+    "biotherapeutics", "biotech", "biotechnology", "biologics", "bio", "sciences", "science",
+    "oncology", "medical", "health", "healthcare", "laboratories", "labs", "research", "development",
+}
+
+def normalize_sponsor(name: str) -> str:
+    """Lowercase, strip punctuation and corporate suffixes ("Johnson and Johnson" == "Johnson & Johnson")"""
+    tokens = re.sub(r"[^a-z0-9]+", " ", name.lower()).split()
+    core = [t for t in tokens if t not in SPONSOR_SUFFIXES]
+    return " ".join(core or tokens[:1])
+
+def distinctive_tokens(normalized: str) -> List[str]:
+    return [t for t in normalized.split() if t not in SPONSOR_GENERIC_TOKENS]
+
+def distinctive_tokens_match(a: str, b: str) -> bool:
+    """Every distinctive (non-generic) token closely matches its counterpart, e.g. typos but not Sana/Sage"""
+    tokens_a, tokens_b = distinctive_tokens(a), distinctive_tokens(b)
+    if not tokens_a or len(tokens_a) != len(tokens_b):
+        return False
+    return all(
+        difflib.SequenceMatcher(None, x, y).ratio() >= SPONSOR_MATCH_CUTOFF
+        for x, y in zip(tokens_a, tokens_b)
+    )
+
+class SponsorAliasIndex:
+    """Maps company and sponsor names to a canonical group of CT.gov sponsor aliases"""
+    
+    def __init__(self, subsidiaries: Dict[str, List[str]]):
+        self.lookup: Dict[str, str] = {}
+        self.groups: Dict[str, set] = {}
+        # Groups by the 3-character prefix of each distinctive token, to find fuzzy-match candidates
+        self.prefixes: Dict[str, set] = {}
+        for company, aliases in subsidiaries.items():
+            canonical = self.register(company)
+            for alias in aliases:
+                self.add_alias(canonical, alias)
+        self.seeded = {alias for group in self.groups.values() for alias in group}
+    
+    def add_group(self, canonical: str):
+        if canonical not in self.groups:
+            self.groups[canonical] = set()
+            for token in distinctive_tokens(canonical):
+                self.prefixes.setdefault(token[:3], set()).add(canonical)
+        self.lookup.setdefault(canonical, canonical)
+    
+    def register(self, name: str) -> str:
+        canonical = normalize_sponsor(name)
+        self.add_group(canonical)
+        self.groups[canonical].add(name)
+        return canonical
+    
+    def add_alias(self, canonical: str, alias: str):
+        normalized = normalize_sponsor(alias)
+        if self.lookup.setdefault(normalized, canonical) == canonical:
+            self.groups[canonical].add(alias)
+    
+    def resolve(self, name: str) -> str:
+        """Canonical group for a name; read-only, so arbitrary query strings never enter the index"""
+        normalized = normalize_sponsor(name)
+        return self.lookup.get(normalized, normalized)
+    
+    def track(self, name: str) -> str:
+        """Attach a tracked company to a seeded or tracked group it closely matches, else start its own"""
+        normalized = normalize_sponsor(name)
+        if normalized in self.lookup:
+            return self.lookup[normalized]
+        tokens = distinctive_tokens(normalized)
+        candidates = set.intersection(*(self.prefixes.get(t[:3], set()) for t in tokens)) if tokens else set()
+        matches = [c for c in candidates if distinctive_tokens_match(normalized, c)]
+        if matches:
+            match = max(matches, key=lambda c: difflib.SequenceMatcher(None, normalized, c).ratio())
+            self.add_alias(match, name)
+            return match
+        return self.register(name)
+    
+    def aliases(self, name: str) -> List[str]:
+        group = self.groups.get(self.resolve(name))
+        if not group:
+            return [name]
+        # Shortest spellings first: they are the broadest sponsor matches
+        return sorted(group, key=lambda a: (len(a), a))[:MAX_SPONSOR_ALIASES]
+    
+    def learn(self, canonical: str, sponsors: List[str]):
+        """Adopt new spellings from trial results that differ from this group's name only by suffixes or punctuation"""
+        group = self.groups.get(canonical)
+        if group is None:
+            return
+        for sponsor in set(sponsors):
+            if len(group) >= MAX_SPONSOR_ALIASES:
+                break
+            if sponsor not in group and normalize_sponsor(sponsor) == canonical:
+                group.add(sponsor)
+    
+    def snapshot(self) -> Dict[str, List[str]]:
+        """Names tracked or learned since startup, per group; the seeded subsidiaries are not repeated"""
+        learned = {canonical: sorted(group - self.seeded) for canonical, group in self.groups.items()}
+        return {canonical: names[:MAX_SPONSOR_ALIASES] for canonical, names in learned.items() if names}
+    
+    def restore(self, groups: Dict[str, List[str]]):
+        """Re-add tracked and learned names from a snapshot, rebuilding the lookup through add_alias"""
+        for canonical, names in groups.items():
+            self.add_group(canonical)
+            for name in names[:MAX_SPONSOR_ALIASES]:
+                self.add_alias(canonical, name)
+
+sponsor_index = SponsorAliasIndex(SPONSOR_SUBSIDIARIES)
+
+def build_sponsor_query(aliases: List[str]) -> str:
+    """One combined OR query across every sponsor alias"""
+    return " OR ".join(f'sponsor:"{alias}"' for alias in aliases)
+
+@app.get("/api/sponsors/{company_name}", tags=["Clinical Trials"])
+async def get_sponsor_aliases(company_name: str):
+    """Show the sponsor names a company's trial lookup resolves to"""
+    return {
+        "company_name": company_name,
+        "canonical": sponsor_index.resolve(company_name),
+        "aliases": sponsor_index.aliases(company_name)
+    }
+
+CTGOV_STUDY_FIELDS = "NCTId,BriefTitle,Phase,EnrollmentCount,LeadSponsorName,OverallStatus,InterventionName,InterventionType"
+MOLECULE_INTERVENTION_TYPES = {"DRUG", "BIOLOGICAL"}
+
+def parse_ctgov_study(study: Dict[str, Any]) -> ClinicalTrial:
+    """Build a ClinicalTrial from a CT.gov v2 study (nested protocolSection) or a flat record"""
+    protocol = study.get("protocolSection")
+    if protocol is None:
+        interventions = study.get("interventionName") or []
+        return ClinicalTrial(
+            phase=study.get("phase", "Unknown"),
+            title=study.get("briefTitle", "No title"),
+            interventions=[interventions] if isinstance(interventions, str) else list(interventions),
+            enrollment=study.get("enrollmentCount", 0),
+            status=study.get("overallStatus", "Unknown"),
+            sponsor=study.get("leadSponsorName", "Unknown")
+        )
+    
+    design = protocol.get("designModule", {})
+    phases = design.get("phases") or []
+    interventions = protocol.get("armsInterventionsModule", {}).get("interventions", [])
+    # Only drugs and biologics are worth a ChEMBL lookup; devices, procedures and placebo are not
+    names = [
+        i["name"] for i in interventions
+        if i.get("name") and i.get("type", "DRUG") in MOLECULE_INTERVENTION_TYPES and "placebo" not in i["name"].lower()
+    ]
+    return ClinicalTrial(
+        phase=phases[-1] if phases else "Unknown",
+        title=protocol.get("identificationModule", {}).get("briefTitle", "No title"),
+        interventions=list(dict.fromkeys(names)),
+        enrollment=design.get("enrollmentInfo", {}).get("count", 0),
+        status=protocol.get("statusModule", {}).get("overallStatus", "Unknown"),
+        sponsor=protocol.get("sponsorCollaboratorsModule", {}).get("leadSponsor", {}).get("name", "Unknown")
+    )
+
+async def load_company_trials(company_name: str) -> List[ClinicalTrial]:
+    """Get clinical trials for a company, including its subsidiaries"""
     if MOCK_MODE:
         # Return mock data
-        return [
-            ClinicalTrial(
-                phase="PHASE2",
-                title=f"Mock Trial for {company_name}",
-                interventions=["ABC-123", "XYZ-789"],
-                enrollment=220,
-                status="Recruiting",
-                sponsor=company_name
-            )
-        ]
+        return get_mock_trials(company_name)
+    
+    canonical = sponsor_index.resolve(company_name)
+    cached = cache_get(trials_cache, canonical)
+    if cached is not None:
+        return cached
     
     try:
         async with httpx.AsyncClient() as client:
             # ClinicalTrials.gov API call
             search_url = f"{CTGOV_BASE}/studies"
             params = {
-                "query": f"sponsor:\"{company_name}\"",
-                "fields": "NCTId,BriefTitle,Phase,EnrollmentCount,LeadSponsorName,OverallStatus"
+                "query": build_sponsor_query(sponsor_index.aliases(company_name)),
+                "fields": CTGOV_STUDY_FIELDS
             }
             
-            response = await client.get(search_url, params=params)
+            response = await within_deadline(client.get(search_url, params=params), "ctgov.studies")
             response.raise_for_status()
             
-            trials_data = response.json()
-            trials = []
-            
-            for trial in trials_data.get("studies", []):
-                trials.append(ClinicalTrial(
-                    phase=trial.get("phase", "Unknown"),
-                    title=trial.get("briefTitle", "No title"),
-                    interventions=[],  # Would need additional API call
-                    enrollment=trial.get("enrollmentCount", 0),
-                    status=trial.get("overallStatus", "Unknown"),
-                    sponsor=trial.get("leadSponsorName", "Unknown")
-                ))
+            trials = [parse_ctgov_study(study) for study in response.json().get("studies", [])]
             
+            sponsor_index.learn(canonical, [t.sponsor for t in trials if t.sponsor])
+            cache_set(trials_cache, canonical, trials)
             return trials
             
+    except DeadlineExceeded:
+        stale = cache_get(trials_cache, canonical, allow_stale=True)
+        if stale is not None:
+            logger.warning(f"Deadline reached fetching trials for {company_name}, serving stale cache")
+            return stale
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Clinical trials lookup exceeded the request deadline"
+        )
     except Exception as e:
         logger.error(f"Error fetching clinical trials for {company_name}: {e}")
         raise HTTPException(
@@ -584,6 +1852,11 @@ async def get_company_trials(company_name: str):
             detail="Failed to fetch clinical trials"
         )
 
+@app.get("/api/clinical-trials/{company_name}", response_model=List[ClinicalTrial], tags=["Clinical Trials"])
+async def get_company_trials(company_name: str, request: Request):
+    """Get clinical trials for a company as JSON, MessagePack or Arrow depending on Accept"""
+    return negotiated_response(request, await load_company_trials(company_name))
+
 # ChEMBL API endpoints
 @app.get("/api/molecules/{compound_id}", response_model=MoleculeData, tags=["Molecules"])
 async def get_molecule_data(compound_id: str):
@@ -599,7 +1872,7 @@ async def get_molecule_data(compound_id: str):
         async with httpx.AsyncClient() as client:
             # ChEMBL API call
             molecule_url = f"{CHEMBL_BASE}/molecule/{compound_id}"
-            response = await client.get(molecule_url)
+            response = await within_deadline(client.get(molecule_url), "chembl.molecule")
             response.raise_for_status()
             
             molecule_data = response.json()
@@ -609,6 +1882,11 @@ async def get_molecule_data(compound_id: str):
                 max_phase_by_molecule={compound_id: molecule_data.get("max_phase", 0)}
             )
             
+    except DeadlineExceeded:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Molecule lookup exceeded the request deadline"
+        )
     except Exception as e:
         logger.error(f"Error fetching molecule data for {compound_id}: {e}")
         raise HTTPException(
@@ -617,26 +1895,30 @@ async def get_molecule_data(compound_id: str):
         )
 
 # Company Ranking API endpoints
+def compute_company_ranking(input_data: CompanyRankingInput) -> CompanyRankingOutput:
+    """Score a company on maturity (x) and differentiation (y)"""
+    # Mock ranking for now - would integrate with actual AI service
+    if MOCK_MODE:
+        return CompanyRankingOutput(
+            x=0.6,  # Maturity score
+            y=0.7,  # Differentiation score
+            rationale="Mock ranking based on company data analysis"
+        )
+    
+    # TODO: Implement actual AI ranking logic
+    # This would integrate with OpenAI or other AI services
+    
+    return CompanyRankingOutput(
+        x=0.5,
+        y=0.5,
+        rationale="AI ranking service not yet implemented"
+    )
+
 @app.post("/api/ranking/company", response_model=CompanyRankingOutput, tags=["AI Ranking"])
 async def rank_company(input_data: CompanyRankingInput):
     """Rank a company using AI and heuristics"""
     try:
-        # Mock ranking for now - would integrate with actual AI service
-        if MOCK_MODE:
-            return CompanyRankingOutput(
-                x=0.6,  # Maturity score
-                y=0.7,  # Differentiation score
-                rationale="Mock ranking based on company data analysis"
-            )
-        
-        # TODO: Implement actual AI ranking logic
-        # This would integrate with OpenAI or other AI services
-        
-        return CompanyRankingOutput(
-            x=0.5,
-            y=0.5,
-            rationale="AI ranking service not yet implemented"
-        )
+        return compute_company_ranking(input_data)
         
     except Exception as e:
         logger.error(f"Error in company ranking: {e}")
@@ -645,11 +1927,346 @@ async def rank_company(input_data: CompanyRankingInput):
             detail="Failed to rank company"
         )
 
+@app.get("/api/ranking/cohort", response_model=List[CohortRankingEntry], tags=["AI Ranking"])
+async def rank_cohort(request: Request):
+    """Rank every tracked company, best combined score first"""
+    rankings = []
+    for company in companies_db:
+        ranking = compute_company_ranking(
+            CompanyRankingInput(company_name=company["name"], ticker=company["ticker"])
+        )
+        rankings.append(CohortRankingEntry(
+            company_name=company["name"], ticker=company["ticker"], **ranking.model_dump()
+        ))
+    rankings.sort(key=lambda entry: entry.x + entry.y, reverse=True)
+    return negotiated_response(request, rankings)
+
+# Company analysis: profile, trials, molecules and ranking composed server-side
+async def fetch_molecules(compound_ids: List[str]) -> MoleculeData:
+    """Look up several molecules in a single ChEMBL call"""
+    if not compound_ids:
+        return MoleculeData(distinct_targets=0, max_phase_by_molecule={})
+    if MOCK_MODE:
+        return MoleculeData(
+            distinct_targets=5 * len(compound_ids),
+            max_phase_by_molecule={compound_id: 2 for compound_id in compound_ids}
+        )
+    
+    async with httpx.AsyncClient() as client:
+        molecule_url = f"{CHEMBL_BASE}/molecule.json"
+        params = {"pref_name__in": ",".join(c.upper() for c in compound_ids), "limit": len(compound_ids)}
+        response = await within_deadline(client.get(molecule_url, params=params), "chembl.molecules")
+        response.raise_for_status()
+    
+    molecules = response.json().get("molecules", [])
+    phases = {(m.get("pref_name") or "").upper(): int(float(m.get("max_phase") or 0)) for m in molecules}
+    return MoleculeData(
+        distinct_targets=sum(len(m.get("targets", [])) for m in molecules),
+        max_phase_by_molecule={compound_id: phases.get(compound_id.upper(), 0) for compound_id in compound_ids}
+    )
+
+@app.get("/api/analysis/{ticker}", tags=["Analysis"])
+async def get_company_analysis(ticker: str, company_name: Optional[str] = None):
+    """Stream a company's profile, trials, molecules and ranking as NDJSON sections, each as soon as it is ready.
+    
+    Profile, trials and ranking run in parallel, and molecules are batched from the trial
+    interventions as soon as trials arrive. Ranking does not use the other sections yet.
+    """
+    ticker = ticker.upper()
+    known = companies_by_ticker.get(ticker)
+    company_name = company_name or (known["name"] if known else None)
+    sections: asyncio.Queue = asyncio.Queue()
+    
+    async def run(section: str, awaitable):
+        """Publish a section's result or error; failures never propagate to dependents"""
+        try:
+            result = await awaitable
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e) or type(e).__name__
+            logger.warning(f"Analysis section {section} failed for {ticker}: {detail}")
+            await sections.put({"section": section, "error": detail})
+            return None
+        await sections.put({"section": section, "data": jsonable_encoder(result)})
+        return result
+    
+    async def stream():
+        started = time.monotonic()
+        
+        async def trials_step():
+            name = company_name
+            if name is None:
+                # Without a known name, trials have to wait for the profile
+                profile = await profile_task
+                name = profile.company_name if profile and profile.company_name else ticker
+            return await run("trials", load_company_trials(name))
+        
+        async def molecules_step():
+            trials = await trials_task
+            interventions = sorted({i for trial in trials or [] for i in trial.interventions})
+            return await run("molecules", fetch_molecules(interventions))
+        
+        async def rank():
+            return compute_company_ranking(
+                CompanyRankingInput(company_name=company_name or ticker, ticker=ticker)
+            )
+        
+        profile_task = asyncio.create_task(run("profile", get_company_profile(ticker)))
+        trials_task = asyncio.create_task(trials_step())
+        molecules_task = asyncio.create_task(molecules_step())
+        ranking_task = asyncio.create_task(run("ranking", rank()))
+        tasks = [profile_task, trials_task, molecules_task, ranking_task]
+        try:
+            for _ in tasks:
+                yield json.dumps(await sections.get()) + "\n"
+            elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+            yield json.dumps({"section": "done", "elapsed_ms": elapsed_ms}) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# Peer aggregates
+PEER_LEVELS = ("sector", "industry")
+PEER_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Each metric is numerator/denominator over cohort columns, or the raw column when the denominator is None
+PEER_METRICS = {
+    "rd_intensity": ("rd_expense", "revenue"),
+    "ev_revenue": ("enterprise_value", "revenue"),
+    "gross_margin": ("gross_profit", "revenue"),
+    "operating_margin": ("operating_income", "revenue"),
+    "ebitda_margin": ("ebitda", "revenue"),
+    "net_margin": ("net_income", "revenue"),
+    "pe_ratio": ("pe_ratio", None),
+    "market_cap": ("market_cap", None),
+}
+
+class MetricSummary(BaseModel):
+    count: int
+    mean: float
+    min: float
+    max: float
+    percentiles: Dict[str, float]
+
+class PeerAggregates(BaseModel):
+    level: str
+    name: str
+    count: int
+    metrics: Dict[str, MetricSummary]
+    updated_at: datetime
+
+def _percentile(values: np.ndarray, pct: float) -> float:
+    """Linearly interpolated percentile of an already sorted array"""
+    position = (len(values) - 1) * pct / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return float(values[lower] + (values[upper] - values[lower]) * (position - lower))
+
+class PeerGroup:
+    """Sorted metric values and running sums for one sector or industry, seeded from the cohort"""
+    
+    def __init__(self, level: str, name: str, count: int, values: Dict[str, np.ndarray],
+                 version: tuple, updated_at: datetime):
+        self.level = level
+        self.name = name
+        self.count = count
+        self.values = {metric: np.sort(column) for metric, column in values.items()}
+        self.sums = {metric: float(column.sum()) for metric, column in values.items()}
+        self.version = version
+        self.updated_at = updated_at
+        self.summary: Optional[PeerAggregates] = None
+    
+    def add(self, metrics: Dict[str, float]):
+        self.count += 1
+        for metric, value in metrics.items():
+            values = self.values[metric]
+            self.values[metric] = np.insert(values, np.searchsorted(values, value), value)
+            self.sums[metric] += value
+        self.summary = None
+    
+    def remove(self, metrics: Dict[str, float]):
+        self.count -= 1
+        for metric, value in metrics.items():
+            values = self.values[metric]
+            self.values[metric] = np.delete(values, np.searchsorted(values, value))
+            self.sums[metric] -= value
+        self.summary = None
+    
+    def summarize(self) -> PeerAggregates:
+        """Summary is rebuilt at most once per change, from the already sorted values"""
+        if self.summary is None:
+            metrics = {}
+            for metric, values in self.values.items():
+                if not values.size:
+                    continue
+                metrics[metric] = MetricSummary(
+                    count=values.size,
+                    mean=self.sums[metric] / values.size,
+                    min=float(values[0]),
+                    max=float(values[-1]),
+                    percentiles={f"p{pct}": _percentile(values, pct) for pct in PEER_PERCENTILES}
+                )
+            self.summary = PeerAggregates(
+                level=self.level,
+                name=self.name,
+                count=self.count,
+                metrics=metrics,
+                updated_at=self.updated_at
+            )
+        return self.summary
+
+class PeerRollups:
+    """Per-sector and per-industry aggregates derived from the cohort's columns.
+    
+    Groups are case-insensitive unions of the cohort's interned sector/industry codes.
+    A group is seeded from its rows on first read, then kept current by `leave`/`join`
+    around each cohort upsert. Any other change to the group's rows (bulk extend,
+    remove, snapshot restore) moves its version in the cohort and forces a reseed.
+    """
+    
+    def __init__(self, cohort: FinancialCohort):
+        self.cohort = cohort
+        self.updated: Dict[tuple, datetime] = {}
+        self.groups: Dict[tuple, PeerGroup] = {}
+        self.moving: set = set()
+    
+    def labels(self, level: str, name: str) -> List[str]:
+        key = name.lower()
+        return [label for label in self.cohort.categories[level] if label.lower() == key]
+    
+    def version(self, level: str, labels: List[str]) -> tuple:
+        return self.cohort.group_version(level, [self.cohort.category_index[level][label] for label in labels])
+    
+    def current(self, key: tuple) -> Optional[PeerGroup]:
+        """The cached group for `key`, if it still matches the cohort"""
+        group = self.groups.get(key)
+        if group is None:
+            return None
+        labels = self.labels(*key)
+        if labels and group.version == self.version(key[0], labels):
+            return group
+        del self.groups[key]
+        return None
+    
+    def row_keys(self, row: int) -> List[tuple]:
+        keys = []
+        for level in PEER_LEVELS:
+            code = self.cohort.codes[level][row]
+            if code >= 0:
+                keys.append((level, self.cohort.categories[level][code].lower()))
+        return keys
+    
+    def row_metrics(self, row: int) -> Dict[str, float]:
+        values = self.metric_values(np.array([row]))
+        return {metric: float(column[0]) for metric, column in values.items() if column.size}
+    
+    def leave(self, ticker: str, data: FinancialData):
+        """Take a ticker's current row out of its groups; call just before the cohort upsert"""
+        now = datetime.now()
+        keys = {(level, getattr(data, level).lower()) for level in PEER_LEVELS if getattr(data, level)}
+        row = self.cohort.index.get(ticker)
+        previous = self.row_keys(row) if row is not None else []
+        for key in keys.union(previous):
+            self.updated[key] = now
+            if self.current(key):
+                self.moving.add(key)
+        if previous:
+            metrics = self.row_metrics(row)
+            for key in previous:
+                if key in self.moving:
+                    self.groups[key].remove(metrics)
+    
+    def join(self, ticker: str):
+        """Add a ticker's new row to its groups; call just after the cohort upsert"""
+        row = self.cohort.index[ticker]
+        metrics = self.row_metrics(row)
+        for key in self.row_keys(row):
+            if key in self.moving:
+                self.groups[key].add(metrics)
+        for key in self.moving:
+            group = self.groups[key]
+            if group.count:
+                group.version = self.version(key[0], self.labels(*key))
+                group.updated_at = self.updated[key]
+            else:
+                del self.groups[key]
+        self.moving.clear()
+    
+    def list_groups(self, level: str) -> List[Dict[str, Any]]:
+        codes = self.cohort.category_codes(level)
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.cohort.categories[level]))
+        groups: Dict[str, Dict[str, Any]] = {}
+        for label, count in zip(self.cohort.categories[level], counts.tolist()):
+            if count:
+                group = groups.setdefault(label.lower(), {"name": label, "count": 0})
+                group["count"] += count
+        return list(groups.values())
+    
+    def metric_values(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Finite values of each peer metric for the given rows"""
+        values = {}
+        for metric, (numerator, denominator) in PEER_METRICS.items():
+            if denominator:
+                column = self.cohort.ratio(numerator, denominator, rows)
+            else:
+                column = self.cohort.column(numerator)[rows].astype(np.float64)
+                column = column[column != 0]
+            values[metric] = column[np.isfinite(column)]
+        return values
+    
+    def get(self, level: str, name: str) -> Optional[PeerAggregates]:
+        key = (level, name.lower())
+        group = self.current(key)
+        if group is None:
+            labels = self.labels(level, name)
+            if not labels:
+                return None
+            mask = np.logical_or.reduce([self.cohort.group_mask(level, label) for label in labels])
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                return None
+            group = PeerGroup(
+                level, labels[0], len(rows), self.metric_values(rows),
+                version=self.version(level, labels),
+                updated_at=self.updated.setdefault(key, datetime.now())
+            )
+            self.groups[key] = group
+        return group.summarize()
+
+peer_rollups = PeerRollups(financial_cohort)
+
+@app.get("/api/peers", tags=["Peers"])
+async def list_peer_groups(level: str = "industry"):
+    """List tracked peer groups and their member counts"""
+    if level not in PEER_LEVELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Level must be one of: {', '.join(PEER_LEVELS)}"
+        )
+    return peer_rollups.list_groups(level)
+
+@app.get("/api/peers/{name:path}", response_model=PeerAggregates, tags=["Peers"])
+async def get_peer_aggregates(name: str, level: str = "industry"):
+    """Get precomputed peer aggregates for an industry (or sector with ?level=sector)"""
+    if level not in PEER_LEVELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Level must be one of: {', '.join(PEER_LEVELS)}"
+        )
+    aggregates = peer_rollups.get(level, name)
+    if aggregates is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No peer data for {level} '{name}'"
+        )
+    return aggregates
+
 # Companies API endpoints
 @app.get("/api/companies", response_model=List[Company], tags=["Companies"])
-async def get_companies():
-    """Get all companies"""
-    return companies_db
+async def get_companies(request: Request):
+    """Get all companies as JSON, MessagePack or Arrow depending on Accept"""
+    return negotiated_response(request, companies_db)
 
 @app.get("/api/companies/{company_id}", response_model=Company, tags=["Companies"])
 async def get_company(company_id: str):
@@ -666,7 +2283,7 @@ async def get_company(company_id: str):
 async def create_company(company: CompanyCreate):
     """Create a new company"""
     # Check if ticker already exists
-    if any(c["ticker"] == company.ticker.upper() for c in companies_db):
+    if company.ticker.upper() in companies_by_ticker:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Company with this ticker already exists"
@@ -678,28 +2295,213 @@ async def create_company(company: CompanyCreate):
         try:
             async with httpx.AsyncClient() as client:
                 profile_url = f"{FMP_BASE_URL}/profile?symbol={company.ticker}&apikey={FMP_API_KEY}"
-                response = await client.get(profile_url)
+                response = await within_deadline(client.get(profile_url), "fmp.profile")
                 if response.status_code == 200:
                     profile_data = response.json()
                     if profile_data and len(profile_data) > 0:
                         description = profile_data[0].get("description", "No description available.")
         except Exception as e:
             logger.warning(f"Failed to fetch description for {company.ticker}: {e}")
-            description = "Company description will be populated here."
+            description = DEFAULT_DESCRIPTION
     
-    new_company = {
+    new_company = build_company_record(company, description)
+    companies_db.append(new_company)
+    companies_by_ticker[new_company["ticker"]] = new_company
+    sponsor_index.track(new_company["name"])
+    logger.info(f"Created company: {new_company['name']} ({new_company['ticker']})")
+    return new_company
+
+# In-flight background tasks, referenced so they are not garbage collected
+background_tasks = set()
+
+def build_company_record(company: CompanyCreate, description: Optional[str] = None) -> Dict[str, Any]:
+    """Build the stored representation of a new company"""
+    return {
         "id": f"{company.ticker}-{datetime.now().timestamp()}",
         "name": company.name,
         "ticker": company.ticker.upper(),
-        "description": description or "Company description will be populated here.",
+        "description": description or DEFAULT_DESCRIPTION,
         "company_type": company.company_type or "Unknown",
         "created_at": datetime.now(),
         "updated_at": datetime.now()
     }
+
+async def iter_request_lines(request: Request):
+    """Yield decoded lines, without line endings, from a streamed request body"""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending.strip():
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+def csv_line_ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV line ends inside a quoted field, following csv's default dialect.
     
-    companies_db.append(new_company)
-    logger.info(f"Created company: {new_company['name']} ({new_company['ticker']})")
-    return new_company
+    A quote only opens a field at its start; `""` is an escaped quote; after the
+    closing quote the rest of the field is literal. Quotes anywhere else are text.
+    """
+    position, length = 0, len(line)
+    while position < length:
+        if quoted:
+            end = line.find('"', position)
+            if end < 0:
+                return True
+            if line.startswith('"', end + 1):
+                position = end + 2
+                continue
+            quoted = False
+            position = end + 1
+        elif line.startswith('"', position):
+            quoted = True
+            position += 1
+            continue
+        delimiter = line.find(",", position)
+        if delimiter < 0:
+            return False
+        position = delimiter + 1
+    return quoted
+
+async def iter_bulk_records(request: Request):
+    """Parse a CSV (with header row) or NDJSON body, yielding (record, error) pairs"""
+    if "csv" not in request.headers.get("content-type", ""):
+        async for line in iter_request_lines(request):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield None, f"Malformed JSON: {e}"
+                continue
+            if isinstance(record, dict):
+                yield record, None
+            else:
+                yield None, "Each line must be a JSON object"
+        return
+    
+    # Lines are buffered until the record's quotes close, so quoted fields may span lines while
+    # quotes inside unquoted fields (O"Neil Corp) stay literal text; csv then parses each record.
+    buffered: List[str] = []
+    size = 0
+    quoted = False
+    header = None
+    line_number = 0
+    started = 0
+    async for line in iter_request_lines(request):
+        line_number += 1
+        if not buffered:
+            if not line.strip():
+                continue
+            started = line_number
+        buffered.append(line + "\n")
+        size += len(line) + 1
+        quoted = csv_line_ends_quoted(line, quoted)
+        if quoted and size <= csv.field_size_limit():
+            continue
+        record, buffered, size = buffered, [], 0
+        if quoted:
+            quoted = False
+            yield None, f"Malformed CSV on line {started}: quoted field larger than {csv.field_size_limit()} characters"
+            continue
+        for values in csv.reader(record):
+            if header is None:
+                header = [column.strip() for column in values]
+            else:
+                yield {key: value for key, value in zip(header, values) if value != ""}, None
+    if buffered:
+        yield None, f"Unterminated quoted field starting on line {started}"
+
+async def fetch_fmp_profiles(client: httpx.AsyncClient, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch FMP profiles for several tickers in a single multi-symbol call"""
+    profile_url = f"{FMP_BASE_URL}/profile?symbol={','.join(tickers)}&apikey={FMP_API_KEY}"
+    response = await client.get(profile_url)
+    response.raise_for_status()
+    return {p["symbol"].upper(): p for p in response.json() or [] if p.get("symbol")}
+
+async def enrich_companies(tickers: List[str]):
+    """Fill in missing descriptions from FMP profiles with bounded concurrency"""
+    semaphore = asyncio.Semaphore(ENRICH_CONCURRENCY)
+    
+    async def enrich_batch(client: httpx.AsyncClient, batch: List[str]):
+        async with semaphore:
+            try:
+                profiles = await fetch_fmp_profiles(client, batch)
+            except Exception as e:
+                logger.warning(f"Failed to enrich {len(batch)} companies: {e}")
+                return
+        for ticker, profile in profiles.items():
+            company = companies_by_ticker.get(ticker)
+            if company and company["description"] == DEFAULT_DESCRIPTION:
+                description = profile.get("description") or "No description available."
+                company["description"] = description[:1000]
+                company["updated_at"] = datetime.now()
+    
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*(
+            enrich_batch(client, tickers[i:i + FMP_BATCH_SIZE])
+            for i in range(0, len(tickers), FMP_BATCH_SIZE)
+        ))
+    logger.info(f"Enriched descriptions for {len(tickers)} imported companies")
+
+@app.post("/api/companies/bulk", tags=["Companies"])
+async def bulk_create_companies(request: Request):
+    """Import many companies from a CSV or NDJSON body"""
+    results = []
+    batch = []
+    to_enrich = []
+    created = 0
+    row = 0
+    
+    async for record, error in iter_bulk_records(request):
+        row += 1
+        if error is None:
+            try:
+                company = CompanyCreate(**record)
+            except ValidationError as e:
+                error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        if error is not None:
+            results.append({"row": row, "ticker": (record or {}).get("ticker"), "status": "invalid", "error": error})
+            continue
+        
+        # Dedupe against existing companies and earlier rows of this import
+        ticker = company.ticker.upper()
+        if ticker in companies_by_ticker:
+            results.append({"row": row, "ticker": ticker, "status": "duplicate"})
+            continue
+        
+        new_company = build_company_record(company, company.description)
+        companies_by_ticker[ticker] = new_company
+        sponsor_index.track(new_company["name"])
+        batch.append(new_company)
+        created += 1
+        if not company.description:
+            to_enrich.append(ticker)
+        results.append({"row": row, "ticker": ticker, "status": "created", "id": new_company["id"]})
+        
+        if len(batch) >= BULK_BATCH_SIZE:
+            companies_db.extend(batch)
+            batch.clear()
+            await asyncio.sleep(0)
+    companies_db.extend(batch)
+    
+    enrichment_pending = 0
+    if to_enrich and FMP_API_KEY and not MOCK_MODE:
+        task = asyncio.create_task(enrich_companies(to_enrich))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        enrichment_pending = len(to_enrich)
+    
+    logger.info(f"Bulk import: {created} created out of {row} rows")
+    return {
+        "total": row,
+        "created": created,
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "invalid": sum(1 for r in results if r["status"] == "invalid"),
+        "enrichment_pending": enrichment_pending,
+        "results": results
+    }
 
 @app.put("/api/companies/{company_id}", response_model=Company, tags=["Companies"])
 async def update_company(company_id: str, company_update: CompanyUpdate):
@@ -712,11 +2514,26 @@ async def update_company(company_id: str, company_update: CompanyUpdate):
         )
     
     # Update fields
-    for field, value in company_update.dict(exclude_unset=True).items():
+    updates = company_update.dict(exclude_unset=True)
+    old_ticker = companies_db[company_index]["ticker"]
+    new_ticker = (updates.get("ticker") or old_ticker).upper()
+    if new_ticker != old_ticker and new_ticker in companies_by_ticker:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Company with this ticker already exists"
+        )
+    
+    for field, value in updates.items():
         if field == "ticker" and value:
             value = value.upper()
         companies_db[company_index][field] = value
     
+    if new_ticker != old_ticker:
+        companies_by_ticker.pop(old_ticker, None)
+        companies_by_ticker[new_ticker] = companies_db[company_index]
+    if updates.get("name"):
+        sponsor_index.track(updates["name"])
+    
     companies_db[company_index]["updated_at"] = datetime.now()
     
     logger.info(f"Updated company: {companies_db[company_index]['name']}")
@@ -733,6 +2550,7 @@ async def delete_company(company_id: str):
         )
     
     deleted_company = companies_db.pop(company_index)
+    companies_by_ticker.pop(deleted_company["ticker"], None)
     logger.info(f"Deleted company: {deleted_company['name']}")
     
     return {"message": "Company deleted successfully", "company": deleted_company}
@@ -742,10 +2560,535 @@ async def clear_companies():
     """Clear all companies"""
     count = len(companies_db)
     companies_db.clear()
+    companies_by_ticker.clear()
     logger.info(f"Cleared {count} companies")
     
     return {"message": f"Cleared {count} companies"}
 
+# Export API endpoints
+TRIAL_PHASES = ["EARLY_PHASE1", "PHASE1", "PHASE2", "PHASE3", "PHASE4"]
+EXPORT_COMPANY_FIELDS = ["id", "name", "ticker", "company_type"]
+EXPORT_TRIAL_FIELDS = [f"trials_{phase.lower()}" for phase in TRIAL_PHASES] + ["trials_total"]
+EXPORT_RANKING_FIELDS = ["maturity_score", "differentiation_score"]
+EXPORT_COLUMNS = (
+    EXPORT_COMPANY_FIELDS
+    + list(FinancialData.model_fields.keys())
+    + EXPORT_TRIAL_FIELDS
+    + EXPORT_RANKING_FIELDS
+)
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def build_export_row(company: Dict[str, Any], financial: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Join a company with its stored financials, cached trial counts and ranking scores"""
+    ticker = company["ticker"]
+    if financial is None and MOCK_MODE:
+        financial = get_mock_financial_data(ticker).model_dump()
+    trials = cache_get(trials_cache, sponsor_index.resolve(company["name"]))
+    if trials is None and MOCK_MODE:
+        trials = get_mock_trials(company["name"])
+    ranking = compute_company_ranking(
+        CompanyRankingInput(company_name=company["name"], ticker=ticker)
+    )
+    
+    row = {field: company.get(field) for field in EXPORT_COMPANY_FIELDS}
+    row.update(financial or dict.fromkeys(FinancialData.model_fields))
+    
+    phase_counts = dict.fromkeys(TRIAL_PHASES, 0)
+    for trial in trials or []:
+        if trial.phase in phase_counts:
+            phase_counts[trial.phase] += 1
+    for phase, count in phase_counts.items():
+        row[f"trials_{phase.lower()}"] = count if trials is not None else None
+    row["trials_total"] = len(trials) if trials is not None else None
+    
+    row["maturity_score"] = ranking.x
+    row["differentiation_score"] = ranking.y
+    return row
+
+def iter_export_chunks(chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield export rows in fixed-size chunks so memory stays flat"""
+    for start in range(0, len(companies_db), chunk_size):
+        chunk = companies_db[start:start + chunk_size]
+        financials = financial_cohort.rows([c["ticker"] for c in chunk])
+        yield [build_export_row(c, f) for c, f in zip(chunk, financials)]
+
+def export_arrow_schema():
+    """Arrow schema matching EXPORT_COLUMNS"""
+    types = {
+        "company_name": pa.string(), "sector": pa.string(), "industry": pa.string(),
+        "employees": pa.int64(), "volume": pa.int64(), "average_volume": pa.int64(),
+    }
+    types.update({field: pa.string() for field in EXPORT_COMPANY_FIELDS})
+    types.update({field: pa.int64() for field in EXPORT_TRIAL_FIELDS})
+    return pa.schema([(column, types.get(column, pa.float64())) for column in EXPORT_COLUMNS])
+
+class _ChunkSink:
+    """Write-only file object that hands buffered bytes back to a generator"""
+    
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        written = self.buffer.write(data)
+        self.position += written
+        return written
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+def stream_csv():
+    """Stream the export as CSV, one chunk of rows at a time"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for chunk in iter_export_chunks():
+        writer.writerows(chunk)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+    yield output.getvalue()
+
+def stream_ndjson():
+    """Stream the export as newline-delimited JSON"""
+    for chunk in iter_export_chunks():
+        yield "".join(json.dumps(row, default=str) + "\n" for row in chunk)
+
+def stream_arrow(file_format: str):
+    """Stream the export as Arrow IPC record batches or Parquet row groups"""
+    schema = export_arrow_schema()
+    sink = _ChunkSink()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for chunk in iter_export_chunks():
+        if file_format == "parquet":
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+        else:
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+@app.get("/api/export", tags=["Export"])
+async def export_companies(format: str = "csv"):
+    """Stream all companies joined with financials, trial counts and ranking scores"""
+    file_format = format.lower()
+    if file_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    if file_format in ("arrow", "parquet") and pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow/Parquet export requires pyarrow to be installed"
+        )
+    
+    if file_format == "csv":
+        content = stream_csv()
+    elif file_format == "ndjson":
+        content = stream_ndjson()
+    else:
+        content = stream_arrow(file_format)
+    
+    filename = f"atlas-export-{datetime.now():%Y%m%d-%H%M%S}.{file_format}"
+    logger.info(f"Exporting {len(companies_db)} companies as {file_format}")
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Cache snapshots: hot upstream responses and computed results persisted across restarts
+SNAPSHOT_VERSION = 2
+
+def snapshot_schema() -> Dict[str, Any]:
+    """Layout a snapshot must match to be loaded; bump SNAPSHOT_VERSION on format changes"""
+    return {
+        "version": SNAPSHOT_VERSION,
+        "int_fields": COHORT_INT_FIELDS,
+        "float_fields": COHORT_FLOAT_FIELDS,
+        "category_fields": COHORT_CATEGORY_FIELDS,
+        "peer_levels": list(PEER_LEVELS),
+    }
+
+class CacheSnapshotStore:
+    """Writes and restores versioned snapshots of the caches, cohort, sponsor index and peer rollups.
+    
+    Each save goes to a new generation directory, then LATEST is switched atomically.
+    Cohort columns are .npy files memory-mapped copy-on-write; cached trial lists are
+    raw JSON in one memory-mapped blob, decoded per key on first lookup.
+    """
+    
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.loaded: Optional[str] = None
+        self.write_lock = threading.Lock()
+    
+    def capture(self) -> Dict[str, Any]:
+        """Copy the state to persist; runs on the event loop so nothing changes underneath it"""
+        size = financial_cohort.size
+        now = time.time()
+        expiry = np.full(size, np.nan)
+        for cached in (financial_cache, financial_cache.pending):
+            for ticker, (expires_at, _) in cached.items():
+                row = financial_cohort.index.get(ticker)
+                if row is not None and expires_at > now:
+                    expiry[row] = expires_at
+        return {
+            "tickers": financial_cohort.tickers[:size].tolist(),
+            "names": financial_cohort.names[:size].tolist(),
+            "categories": {f: list(v) for f, v in financial_cohort.categories.items()},
+            "arrays": {
+                **{f: a[:size].copy() for f, a in financial_cohort.columns.items()},
+                **{f: a[:size].copy() for f, a in financial_cohort.codes.items()},
+            },
+            "financial_expiry": expiry,
+            "trials": [(k, exp, v) for k, (exp, v) in trials_cache.items() if exp > now],
+            "pending_trials": [(k, exp, raw) for k, (exp, raw) in trials_cache.pending.items() if exp > now],
+            "sponsors": sponsor_index.snapshot(),
+        }
+    
+    def write(self, state: Dict[str, Any]) -> Path:
+        """Write a captured state as a new generation and make it the latest"""
+        with self.write_lock:
+            return self._write(state)
+    
+    def _write(self, state: Dict[str, Any]) -> Path:
+        generation = self.directory / str(time.time_ns())
+        (generation / "cohort").mkdir(parents=True)
+        for field, array in state["arrays"].items():
+            np.save(generation / "cohort" / f"{field}.npy", array)
+        np.save(generation / "financial_expiry.npy", state["financial_expiry"])
+        
+        trials_index = []
+        with open(generation / "trials.bin", "wb") as blob:
+            encoded = (
+                (key, expires_at, json.dumps([t.model_dump() for t in trials]).encode("utf-8"))
+                for key, expires_at, trials in state["trials"]
+            )
+            for key, expires_at, raw in [*encoded, *state["pending_trials"]]:
+                trials_index.append([key, expires_at, blob.tell(), len(raw)])
+                blob.write(raw)
+        
+        manifest = {
+            **snapshot_schema(),
+            "created_at": time.time(),
+            "tickers": state["tickers"],
+            "names": state["names"],
+            "categories": state["categories"],
+            "trials": trials_index,
+            "sponsors": state["sponsors"],
+        }
+        (generation / "manifest.json").write_text(json.dumps(manifest, separators=(",", ":")))
+        
+        latest = self.directory / "LATEST.tmp"
+        latest.write_text(generation.name)
+        os.replace(latest, self.directory / "LATEST")
+        
+        # Keep the generation this process has mapped; older ones are no longer referenced
+        for old in self.directory.iterdir():
+            if old.is_dir() and old.name not in (generation.name, self.loaded):
+                shutil.rmtree(old, ignore_errors=True)
+        return generation
+    
+    async def save(self):
+        started = time.perf_counter()
+        try:
+            state = self.capture()
+            generation = await asyncio.to_thread(self.write, state)
+        except Exception as e:
+            logger.error(f"Failed to write cache snapshot: {e}")
+            return
+        logger.info(
+            f"💾 Snapshot {generation.name}: {len(state['tickers'])} companies, "
+            f"{len(state['trials']) + len(state['pending_trials'])} trial sets "
+            f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+    
+    async def run(self, interval: int):
+        """Save on a timer until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.save()
+    
+    def load(self) -> bool:
+        """Restore the latest snapshot, skipping expired entries; returns False if none is usable"""
+        latest = self.directory / "LATEST"
+        if not latest.exists():
+            return False
+        started = time.perf_counter()
+        generation = self.directory / latest.read_text().strip()
+        try:
+            manifest = json.loads((generation / "manifest.json").read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {generation.name}: {e}")
+            return False
+        schema = snapshot_schema()
+        if {key: manifest.get(key) for key in schema} != schema:
+            logger.warning(f"Ignoring snapshot {generation.name}: written with a different format version")
+            return False
+        
+        now = time.time()
+        tickers = manifest["tickers"]
+        if tickers:
+            arrays = {
+                field: np.load(generation / "cohort" / f"{field}.npy", mmap_mode="c")
+                for field in [*COHORT_INT_FIELDS, *COHORT_FLOAT_FIELDS, *COHORT_CATEGORY_FIELDS]
+            }
+            financial_cohort.restore(
+                tickers, manifest["names"], manifest["categories"],
+                columns={f: arrays[f] for f in [*COHORT_INT_FIELDS, *COHORT_FLOAT_FIELDS]},
+                codes={f: arrays[f] for f in COHORT_CATEGORY_FIELDS},
+            )
+            expiry = np.load(generation / "financial_expiry.npy")
+            for row in np.flatnonzero(expiry > now).tolist():
+                financial_cache.pending[tickers[row]] = (float(expiry[row]), None)
+        
+        if manifest["trials"]:
+            with open(generation / "trials.bin", "rb") as blob:
+                view = memoryview(mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ))
+            for key, expires_at, offset, length in manifest["trials"]:
+                if expires_at > now:
+                    trials_cache.pending[key] = (expires_at, view[offset:offset + length])
+        
+        sponsor_index.restore(manifest["sponsors"])
+        self.loaded = generation.name
+        logger.info(
+            f"♻️ Restored snapshot {generation.name} from {datetime.fromtimestamp(manifest['created_at'])}: "
+            f"{len(tickers)} companies, {len(financial_cache.pending)} cached profiles, "
+            f"{len(trials_cache.pending)} trial sets in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return True
+
+cache_snapshots = CacheSnapshotStore(SNAPSHOT_DIR)
+
+# Live market data subscriptions
+QUOTE_FIELDS = {
+    "price": "price",
+    "marketCap": "market_cap",
+    "volume": "volume",
+    "avgVolume": "average_volume",
+}
+
+def get_mock_quote(ticker: str) -> Dict[str, Any]:
+    """Generate a mock quote that drifts slightly around the mock profile"""
+    data = get_mock_financial_data(ticker)
+    drift = 1 + random.uniform(-0.005, 0.005)
+    return {
+        "price": round(data.price * drift, 2),
+        "market_cap": round(data.market_cap * drift),
+        "volume": data.volume + random.randint(0, 10000),
+        "average_volume": data.average_volume,
+    }
+
+class MarketDataSubscriber:
+    """Coalesces pending field changes for one client so slow sockets never lose the latest value"""
+    
+    def __init__(self):
+        self.tickers = set()
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.ready = asyncio.Event()
+    
+    def push(self, ticker: str, changes: Dict[str, Any]):
+        self.pending.setdefault(ticker, {}).update(changes)
+        self.ready.set()
+    
+    def take(self) -> Dict[str, Dict[str, Any]]:
+        pending, self.pending = self.pending, {}
+        self.ready.clear()
+        return pending
+
+class MarketDataHub:
+    """Single shared poller for all subscribed tickers, fanning changes out to subscribers"""
+    
+    def __init__(self):
+        self.subscribers: Dict[str, set] = {}
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+        self.poller: Optional[asyncio.Task] = None
+        self.upstream_calls = 0
+    
+    def subscribe(self, subscriber: MarketDataSubscriber, tickers: List[str]):
+        for ticker in tickers:
+            subscriber.tickers.add(ticker)
+            self.subscribers.setdefault(ticker, set()).add(subscriber)
+            if ticker in self.snapshots:
+                subscriber.push(ticker, self.snapshots[ticker])
+        self.ensure_poller()
+    
+    def ensure_poller(self):
+        """Start the poller if anyone is subscribed and it is not running"""
+        if self.subscribers and (self.poller is None or self.poller.done()):
+            self.poller = asyncio.create_task(self.poll())
+            self.poller.add_done_callback(self.poller_finished)
+    
+    def poller_finished(self, task: asyncio.Task):
+        # A subscribe can land while the exiting poller closes its client, after its last
+        # check of self.subscribers; restart so that subscriber is not left without updates
+        if not task.cancelled():
+            self.ensure_poller()
+    
+    def unsubscribe(self, subscriber: MarketDataSubscriber, tickers: List[str]):
+        for ticker in tickers:
+            subscriber.tickers.discard(ticker)
+            subscribers = self.subscribers.get(ticker)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[ticker]
+                self.snapshots.pop(ticker, None)
+    
+    async def fetch_quotes(self, client: httpx.AsyncClient, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch quotes for a batch of tickers in one multi-symbol FMP call"""
+        if MOCK_MODE or not FMP_API_KEY:
+            return {ticker: get_mock_quote(ticker) for ticker in tickers}
+        
+        quote_url = f"{FMP_BASE_URL}/quote?symbol={','.join(tickers)}&apikey={FMP_API_KEY}"
+        self.upstream_calls += 1
+        response = await client.get(quote_url)
+        response.raise_for_status()
+        return {
+            quote["symbol"].upper(): {field: quote.get(key) for key, field in QUOTE_FIELDS.items()}
+            for quote in response.json() or [] if quote.get("symbol")
+        }
+    
+    def publish(self, ticker: str, quote: Dict[str, Any]):
+        """Push only the fields that changed since the last poll"""
+        previous = self.snapshots.get(ticker, {})
+        changes = {field: value for field, value in quote.items() if previous.get(field) != value}
+        if not changes or ticker not in self.subscribers:
+            return
+        self.snapshots[ticker] = {**previous, **changes}
+        for subscriber in self.subscribers[ticker]:
+            subscriber.push(ticker, changes)
+    
+    async def poll(self):
+        """Poll upstream while anyone is subscribed, one request per batch of distinct tickers"""
+        logger.info("Market data poller started")
+        async with httpx.AsyncClient() as client:
+            while self.subscribers:
+                tickers = list(self.subscribers)
+                results = await asyncio.gather(
+                    *(self.fetch_quotes(client, tickers[i:i + FMP_BATCH_SIZE])
+                      for i in range(0, len(tickers), FMP_BATCH_SIZE)),
+                    return_exceptions=True
+                )
+                for quotes in results:
+                    if isinstance(quotes, Exception):
+                        logger.warning(f"Failed to poll market data: {quotes}")
+                        continue
+                    for ticker, quote in quotes.items():
+                        self.publish(ticker, quote)
+                await asyncio.sleep(MARKET_POLL_INTERVAL)
+        logger.info("Market data poller stopped")
+    
+    async def stop(self):
+        if self.poller and not self.poller.done():
+            self.poller.cancel()
+            try:
+                await self.poller
+            except asyncio.CancelledError:
+                pass
+
+market_hub = MarketDataHub()
+
+def parse_tickers(value) -> List[str]:
+    """Normalize a comma-separated string or list of tickers, rejecting malformed symbols"""
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        raise ValueError("Tickers must be a list or a comma-separated string")
+    tickers = [str(ticker).strip().upper() for ticker in value if str(ticker).strip()]
+    invalid = [ticker for ticker in tickers if not TICKER_PATTERN.match(ticker)]
+    if invalid:
+        raise ValueError(f"Invalid tickers: {', '.join(invalid[:5])}")
+    if len(set(tickers)) > MAX_WATCHLIST_SIZE:
+        raise ValueError(f"Watchlists are limited to {MAX_WATCHLIST_SIZE} tickers")
+    return list(dict.fromkeys(tickers))
+
+@app.websocket("/ws/market-data")
+async def market_data_stream(websocket: WebSocket, tickers: str = ""):
+    """Stream live price, market cap and volume changes for a watchlist.
+    
+    Send {"action": "subscribe" | "unsubscribe", "tickers": [...]} to change the watchlist.
+    """
+    await websocket.accept()
+    try:
+        initial = parse_tickers(tickers)
+    except ValueError as e:
+        await websocket.send_json({"error": str(e)})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    subscriber = MarketDataSubscriber()
+    market_hub.subscribe(subscriber, initial)
+    
+    async def send_updates():
+        while True:
+            await subscriber.ready.wait()
+            for ticker, changes in subscriber.take().items():
+                await websocket.send_json({"ticker": ticker, "changes": changes})
+    
+    sender = asyncio.create_task(send_updates())
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                action = message.get("action")
+                tickers = message.get("tickers")
+            except (ValueError, AttributeError):
+                await websocket.send_json({"error": "Expected a JSON object with action and tickers"})
+                continue
+            try:
+                requested = parse_tickers(tickers)
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            if action == "subscribe":
+                if len(subscriber.tickers.union(requested)) > MAX_WATCHLIST_SIZE:
+                    await websocket.send_json({"error": f"Watchlists are limited to {MAX_WATCHLIST_SIZE} tickers"})
+                    continue
+                market_hub.subscribe(subscriber, requested)
+            elif action == "unsubscribe":
+                market_hub.unsubscribe(subscriber, requested)
+            else:
+                await websocket.send_json({"error": f"Unknown action: {action}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        market_hub.unsubscribe(subscriber, list(subscriber.tickers))
+
+@app.get("/api/market-data/stats", tags=["Market Data"])
+async def market_data_stats():
+    """Shared poller statistics for monitoring"""
+    return {
+        "tickers": len(market_hub.subscribers),
+        "subscriptions": sum(len(s) for s in market_hub.subscribers.values()),
+        "upstream_calls": market_hub.upstream_calls,
+        "poller_running": market_hub.poller is not None and not market_hub.poller.done(),
+    }
+
 # Mock data endpoints for development
 @app.get("/api/mock/companies", tags=["Mock Data"])
 async def get_mock_companies():
@@ -7,14 +7,16 @@ import json
 
 BASE_URL = "http://localhost:5000"
 
-def test_endpoint(endpoint, method="GET", data=None):
+def test_endpoint(endpoint, method="GET", data=None, headers=None):
     """Test an API endpoint"""
     url = f"{BASE_URL}{endpoint}"
     print(f"\n🧪 Testing {method} {endpoint}")
     
     try:
         if method == "GET":
-            response = requests.get(url)
+            response = requests.get(url, headers=headers)
+        elif method == "POST" and isinstance(data, str):
+            response = requests.post(url, data=data, headers={"Content-Type": "text/csv"})
         elif method == "POST":
             response = requests.post(url, json=data)
         
@@ -47,12 +49,21 @@ def main():
     # Test FMP API (if available)
     test_endpoint("/api/finance/profile/AAPL")
     
+    # Test downsampled price history
+    test_endpoint("/api/finance/history/AAPL?width=300")
+    
     # Test company search
     test_endpoint("/api/finance/search?query=Apple")
     
     # Test clinical trials (mock)
     test_endpoint("/api/clinical-trials/Pfizer")
     
+    # Test composed company analysis
+    test_endpoint("/api/analysis/PFE?company_name=Pfizer")
+    
+    # Test sponsor alias resolution
+    test_endpoint("/api/sponsors/Janssen Research & Development, LLC")
+    
     # Test molecules (mock)
     test_endpoint("/api/molecules/aspirin")
     
@@ -62,6 +73,31 @@ def main():
         "ticker": "AAPL"
     })
     
+    # Test bulk import
+    test_endpoint("/api/companies/bulk", "POST", "name,ticker\nPfizer Inc.,PFE\nEli Lilly and Company,LLY\n")
+    
+    # Quotes inside unquoted fields are literal text: every row below should be created
+    test_endpoint("/api/companies/bulk", "POST", 'name,ticker\nO"Neil Corp,ONC\nBeta,BBB\nX"Y Inc,XY\nGamma,CCC\nDelta,DDD\n')
+    test_endpoint("/api/companies/bulk", "POST", 'name,ticker\nAcme 12" Pipes,ACP\n"Multi\nline Corp",MLC\nOmega,OMG\n')
+    
+    # Test peer aggregates (populated by the profile fetch above)
+    test_endpoint("/api/peers?level=sector")
+    
+    # Test market data poller stats
+    test_endpoint("/api/market-data/stats")
+    
+    # Test admission control stats
+    test_endpoint("/api/admission/stats")
+    
+    # Test content negotiation on bulk endpoints
+    test_endpoint("/api/ranking/cohort")
+    test_endpoint("/api/companies", headers={"Accept": "application/msgpack"})
+    test_endpoint("/api/ranking/cohort", headers={"Accept": "application/vnd.apache.arrow.stream"})
+    
+    # Test bulk export
+    test_endpoint("/api/export?format=csv")
+    test_endpoint("/api/export?format=ndjson")
+    
     print("\n🎯 Testing complete!")
 
 if __name__ == "__main__":